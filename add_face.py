@@ -2,11 +2,13 @@
 
 from core.face_store import recognize, capture_and_add, load_encodings, get_owner_name, ensure_owner_enrolled
 from core.voice_assistant import speak
+from core.camera import get_camera
 
 OWNER = get_owner_name() or "Owner"
 
 def main():
 
+    get_camera()
     ensure_owner_enrolled(speak)
     encodings = load_encodings()
 
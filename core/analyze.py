@@ -6,10 +6,10 @@ def analyze_command(text: str):
     - type: 'device_control' | 'add_face' | 'calendar_query' | 'ai_query'
     - For device_control: {action, device, level(optional)}
     - For calendar_query: {intent: 'today'|'upcoming'}
-    - For ai_query: {prompt}
+    - For ai_query: {prompt, question} (question: see is_plain_question)
     """
     if not text:
-        return {"type": "ai_query", "prompt": ""}
+        return {"type": "ai_query", "prompt": "", "question": False}
 
     raw = text.strip()
 
@@ -219,4 +219,30 @@ def analyze_command(text: str):
             return {"type": "reminder", "at": at.strftime('%Y-%m-%d %H:%M'), "message": raw}
 
 
-    return {"type": "ai_query", "prompt": raw}
+    return {"type": "ai_query", "prompt": raw, "question": is_plain_question(raw)}
+
+
+QUESTION_STARTS = [
+    "what", "who", "whom", "whose", "why", "how", "when", "where", "which",
+    "is", "are", "was", "were", "can", "could", "do", "does", "did", "tell me", "explain",
+    "ما", "ماذا", "من", "لماذا", "ليش", "كيف", "متى", "أين", "وين", "هل", "كم", "اشرح",
+]
+ACTION_WORDS = [
+    "open", "close", "turn", "switch", "light", "door", "fan", "remind", "add", "schedule",
+    "book", "play", "send", "set",
+    "افتح", "اقفل", "سكر", "شغل", "شغّل", "اطفئ", "طفي", "نور", "اضاءة", "الإضاءة", "باب", "ذكرني",
+]
+
+
+def is_plain_question(text: str) -> bool:
+    """True for a question that needs an answer, not an action
+    ("what is a black hole?", "من هو ابن سينا"), so it can skip the JSON parser."""
+    t = (text or "").strip().lower()
+    if not t:
+        return False
+    words = t.replace("؟", " ").replace("?", " ").split()
+    if any(w in words for w in ACTION_WORDS):
+        return False
+    if t.endswith("?") or t.endswith("؟"):
+        return True
+    return any(t == q or t.startswith(q + " ") for q in QUESTION_STARTS)
@@ -0,0 +1,188 @@
+"""
+Shared microphone capture into a ring buffer.
+
+One input stream writes every block into a fixed-size byte ring; the
+wake-word spotter and the command recognizer each read through their own
+cursor, so nothing is lost between wake word and command while a device
+reopens, and a reader can start a little in the past (pre-roll).
+
+The writer never waits for readers. Like a seqlock, it first publishes
+where the block will end, then copies it, then advances a monotonically
+increasing byte position. Readers copy out of the ring and then check the
+published end, so a copy that overlapped bytes being overwritten is
+rejected; a reader that fell more than the ring size behind skips ahead to
+the newest audio.
+
+Environment:
+  TRAVIS_AUDIO_RING_S    -> seconds of audio kept (default 10)
+  TRAVIS_VAD_BLOCK_MS    -> capture block length in ms (see core.vad)
+"""
+
+import os
+import threading
+from typing import Optional
+
+from core.vad import block_ms
+
+
+SAMPLE_RATES = (16000, 44100, 48000)
+SAMPLE_WIDTH = 2  # int16 mono
+
+
+class AudioRing:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._buf = bytearray(capacity)
+        # Total bytes ever written; only the writer advances it.
+        self._written = 0
+        # End of the write in progress, published before its copy starts.
+        self._reserved = 0
+        self._cond = threading.Condition()
+
+    @property
+    def position(self) -> int:
+        return self._written
+
+    @property
+    def oldest(self) -> int:
+        """First position that is not being, or about to be, overwritten."""
+        return max(0, self._reserved - self.capacity)
+
+    def write(self, data: bytes):
+        end = self._written + len(data)
+        if len(data) > self.capacity:
+            data = data[-self.capacity:]
+        n = len(data)
+        self._reserved = end
+        start = (end - n) % self.capacity
+        first = min(n, self.capacity - start)
+        self._buf[start:start + first] = data[:first]
+        if first < n:
+            self._buf[:n - first] = data[first:]
+        self._written = end
+        with self._cond:
+            self._cond.notify_all()
+
+    def read_at(self, pos: int, n: int) -> Optional[bytes]:
+        """Copy n bytes starting at absolute position `pos`; None if they are
+        no longer (or not yet) in the ring."""
+        if pos < self.oldest or pos + n > self._written:
+            return None
+        start = pos % self.capacity
+        first = min(n, self.capacity - start)
+        data = bytes(self._buf[start:start + first])
+        if first < n:
+            data += bytes(self._buf[:n - first])
+        # The writer may have started overwriting these bytes mid-copy.
+        if pos < self.oldest:
+            return None
+        return data
+
+    def wait_for(self, pos: int, timeout: float) -> bool:
+        """Block until `pos` bytes have been written."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._written >= pos, timeout)
+
+
+class RingReader:
+    def __init__(self, ring: AudioRing, pos: int):
+        self.ring = ring
+        self.pos = max(ring.oldest, pos)
+
+    def read(self, n: int, timeout: float = 0.5) -> Optional[bytes]:
+        """Next n bytes, or None if they did not arrive within `timeout`."""
+        if not self.ring.wait_for(self.pos + n, timeout):
+            return None
+        data = self.ring.read_at(self.pos, n)
+        if data is None:
+            print("[Audio] Reader fell behind; skipping to the newest audio.")
+            self.pos = self.ring.position - n
+            data = self.ring.read_at(self.pos, n)
+            if data is None:
+                return None
+        self.pos += n
+        return data
+
+
+class AudioCapture:
+    """The process's microphone stream, written into an AudioRing."""
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.seconds = seconds if seconds is not None else float(os.environ.get("TRAVIS_AUDIO_RING_S", "10"))
+        self.samplerate: Optional[int] = None
+        self.ring: Optional[AudioRing] = None
+        self._stream = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._stream is not None and bool(self._stream.active)
+
+    def start(self) -> "AudioCapture":
+        """Open the input stream (no-op when it is running)."""
+        with self._lock:
+            if self.running:
+                return self
+            self._close()
+            import sounddevice as sd
+            block = block_ms()
+            for sr in SAMPLE_RATES:
+                try:
+                    stream = sd.RawInputStream(samplerate=sr, blocksize=sr * block // 1000, dtype="int16",
+                                               channels=1, callback=self._callback)
+                except Exception:
+                    continue
+                # Positions of existing readers stay valid across a reopen at the same rate.
+                if self.ring is None or sr != self.samplerate:
+                    self.ring = AudioRing(int(sr * SAMPLE_WIDTH * self.seconds))
+                self.samplerate = sr
+                try:
+                    stream.start()
+                except Exception:
+                    stream.close()
+                    continue
+                self._stream = stream
+                break
+            if self._stream is None:
+                raise RuntimeError("No audio input device or unsupported sample rate")
+        return self
+
+    def stop(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except Exception:
+                pass
+            self._stream = None
+
+    def _callback(self, indata, frames, time_info, status):
+        if status:
+            print(status)
+        self.ring.write(bytes(indata))
+
+    def bytes_for_ms(self, ms: float) -> int:
+        return int(self.samplerate * ms / 1000.0) * SAMPLE_WIDTH
+
+    def reader(self, start_at: Optional[int] = None, rewind_ms: float = 0) -> RingReader:
+        """Cursor at `start_at` (default: now), moved back by `rewind_ms`."""
+        self.start()
+        pos = self.ring.position if start_at is None else start_at
+        pos -= self.bytes_for_ms(rewind_ms)
+        return RingReader(self.ring, pos - pos % SAMPLE_WIDTH)
+
+
+_capture: Optional[AudioCapture] = None
+_capture_lock = threading.Lock()
+
+
+def get_audio_capture() -> AudioCapture:
+    """Process-wide microphone capture (started on first reader)."""
+    global _capture
+    with _capture_lock:
+        if _capture is None:
+            _capture = AudioCapture()
+        return _capture
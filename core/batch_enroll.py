@@ -0,0 +1,133 @@
+"""
+Offline batch enrollment from photo folders.
+
+Usage:
+  python -m core.batch_enroll PHOTOS_DIR [--workers 4] [--max-samples 5]
+      [--skip-existing] [--verify-owner] [--dry-run]
+
+PHOTOS_DIR holds one sub-folder per person; the folder name is the identity:
+  PHOTOS_DIR/Sara/*.jpg
+  PHOTOS_DIR/Driver Ahmed/*.png
+
+Faces are detected and encoded across a process pool. Per person, samples
+are kept with the same diversity rule as live enrollment, and all identities
+are written to the gallery in a single store transaction.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+def find_photos(root: str) -> List[Tuple[str, str]]:
+    """(person, path) pairs, sorted so sample selection is deterministic."""
+    jobs = []
+    for person in sorted(os.listdir(root)):
+        folder = os.path.join(root, person)
+        if not os.path.isdir(folder):
+            continue
+        for dirpath, _, files in os.walk(folder):
+            for fn in sorted(files):
+                if fn.lower().endswith(IMAGE_EXTS):
+                    jobs.append((person.strip(), os.path.join(dirpath, fn)))
+    return jobs
+
+
+def encode_photo(job: Tuple[str, str]):
+    """Worker: (person, path) -> (person, path, encoding or None, error or None).
+
+    Group photos may contain bystanders, so only the largest face is used.
+    """
+    person, path = job
+    try:
+        import cv2
+        import face_recognition
+        from core.face_detectors import get_detector
+
+        bgr = cv2.imread(path)
+        if bgr is None:
+            return person, path, None, "unreadable image"
+        rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+        boxes = get_detector().detect(rgb)
+        if not boxes:
+            return person, path, None, "no face found"
+        box = max(boxes, key=lambda b: (b[2] - b[0]) * (b[1] - b[3]))
+        encs = face_recognition.face_encodings(rgb, [box])
+        if not encs:
+            return person, path, None, "could not encode face"
+        return person, path, encs[0], None
+    except Exception as e:
+        return person, path, None, str(e)
+
+
+def enroll_folder(root: str, workers: Optional[int] = None, max_samples: int = 5,
+                  skip_existing: bool = False, dry_run: bool = False) -> Dict[str, int]:
+    """Enroll every person under `root`; returns {name: samples kept}."""
+    from core.face_store import add_if_diverse, add_many_encodings, load_encodings
+
+    jobs = find_photos(root)
+    if not jobs:
+        print(f"[BatchEnroll] No photos found under {root}.")
+        return {}
+    if skip_existing:
+        existing = set(load_encodings())
+        jobs = [j for j in jobs if j[0] not in existing]
+
+    by_person: Dict[str, List] = {}
+    encoded = 0
+    t0 = time.time()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() yields in job order, so the diversity pass is deterministic.
+        for person, path, enc, err in pool.map(encode_photo, jobs, chunksize=4):
+            if err:
+                print(f"[BatchEnroll] {person}: skipped {os.path.basename(path)} ({err})")
+                continue
+            encoded += 1
+            samples = by_person.setdefault(person, [])
+            if len(samples) < max_samples:
+                add_if_diverse(samples, enc)
+
+    kept = {name: len(samples) for name, samples in by_person.items() if samples}
+    print(f"[BatchEnroll] Encoded {encoded}/{len(jobs)} photos in {time.time() - t0:.1f}s.")
+    if kept and not dry_run:
+        add_many_encodings([(name, by_person[name]) for name in kept])
+    for name, n in sorted(kept.items()):
+        print(f"[BatchEnroll] {'Would add' if dry_run else 'Added'} {name} with {n} samples.")
+    return kept
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("root", help="Folder with one sub-folder of photos per person")
+    ap.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    ap.add_argument("--max-samples", type=int, default=5)
+    ap.add_argument("--skip-existing", action="store_true", help="Leave already enrolled names untouched")
+    ap.add_argument("--verify-owner", action="store_true", help="Require the owner's face before writing")
+    ap.add_argument("--dry-run", action="store_true")
+    args = ap.parse_args()
+
+    if not os.path.isdir(args.root):
+        print(f"Not a folder: {args.root}")
+        sys.exit(1)
+
+    if args.verify_owner:
+        from core.face_store import get_owner_name, recognize
+        print("[BatchEnroll] Owner, please look at the camera.")
+        if recognize() != get_owner_name():
+            print("[BatchEnroll] Access denied. Only the owner can add faces.")
+            sys.exit(1)
+
+    kept = enroll_folder(args.root, workers=args.workers, max_samples=args.max_samples,
+                         skip_existing=args.skip_existing, dry_run=args.dry_run)
+    if not kept:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
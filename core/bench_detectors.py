@@ -0,0 +1,124 @@
+"""
+Benchmark face-detector backends on a fixed image set.
+
+Usage:
+  python -m core.bench_detectors --images DIR [--labels labels.json]
+      [--detectors hog,yunet,haar] [--scales 1.0 --scales 0.5,1.0] [--max-side 720] [--repeat 3]
+
+labels.json maps image file names to lists of [top, right, bottom, left]
+boxes. A detection matches a labelled face at IoU >= --iou. Without labels,
+every image is assumed to contain at least one face, and recall is the
+share of images with at least one detection.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+import cv2
+
+from core.face_detectors import DETECTORS, create_detector, parse_scales
+from core.face_tracker import box_iou
+
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def load_images(folder: str):
+    images = []
+    for fn in sorted(os.listdir(folder)):
+        if not fn.lower().endswith(IMAGE_EXTS):
+            continue
+        bgr = cv2.imread(os.path.join(folder, fn))
+        if bgr is None:
+            continue
+        images.append((fn, cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)))
+    return images
+
+
+def _recall(found: List, truth: List, iou: float) -> int:
+    hits = 0
+    used = set()
+    for gt in truth:
+        for i, box in enumerate(found):
+            if i not in used and box_iou(tuple(box), tuple(gt)) >= iou:
+                used.add(i)
+                hits += 1
+                break
+    return hits
+
+
+def run(images, detector, labels: Dict[str, List], repeat: int = 3, iou: float = 0.5) -> Dict:
+    detector.detect(images[0][1])  # warm-up (model load, allocations)
+    elapsed = 0.0
+    faces = 0
+    hits = 0
+    expected = 0
+    for _ in range(max(1, repeat)):
+        hits = expected = 0
+        for fn, rgb in images:
+            t0 = time.perf_counter()
+            found = detector.detect(rgb)
+            elapsed += time.perf_counter() - t0
+            faces += len(found)
+            truth = labels.get(fn)
+            if truth is None:
+                expected += 1
+                hits += 1 if found else 0
+            else:
+                expected += len(truth)
+                hits += _recall(found, truth, iou)
+    frames = len(images) * max(1, repeat)
+    return {
+        "detector": detector.name,
+        "scales": ",".join(str(s) for s in detector.scales),
+        "frames_per_s": frames / elapsed if elapsed else 0.0,
+        "faces_per_s": faces / elapsed if elapsed else 0.0,
+        "ms_per_frame": 1000.0 * elapsed / frames if frames else 0.0,
+        "recall": hits / expected if expected else 0.0,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--images", required=True, help="Folder of test images")
+    ap.add_argument("--labels", default=None, help="JSON file: {image: [[top, right, bottom, left], ...]}")
+    ap.add_argument("--detectors", default=",".join(DETECTORS))
+    ap.add_argument("--scales", action="append", default=None,
+                    help="Scale set to try, e.g. 0.5,1.0 (repeatable)")
+    ap.add_argument("--max-side", type=int, default=720)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--iou", type=float, default=0.5)
+    args = ap.parse_args()
+
+    images = load_images(args.images)
+    if not images:
+        print(f"No images found in {args.images}")
+        sys.exit(1)
+    labels = {}
+    if args.labels:
+        with open(args.labels, "r", encoding="utf-8") as f:
+            labels = json.load(f)
+
+    rows = []
+    for name in [d.strip() for d in args.detectors.split(",") if d.strip()]:
+        for scales in args.scales or ["1.0"]:
+            try:
+                det = create_detector(name, scales=parse_scales(scales), max_side=args.max_side or None)
+            except Exception as e:
+                print(f"[Bench] Skipping {name} ({scales}): {e}")
+                continue
+            rows.append(run(images, det, labels, repeat=args.repeat, iou=args.iou))
+
+    print(f"{len(images)} images, repeat={args.repeat}")
+    print(f"{'detector':<8} {'scales':<10} {'frames/s':>9} {'faces/s':>9} {'ms/frame':>9} {'recall':>7}")
+    for r in sorted(rows, key=lambda r: -r["frames_per_s"]):
+        print(f"{r['detector']:<8} {r['scales']:<10} {r['frames_per_s']:>9.1f} {r['faces_per_s']:>9.1f} "
+              f"{r['ms_per_frame']:>9.1f} {r['recall']:>7.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Deterministic vision benchmark over recorded sessions.
+
+Usage:
+  python -m core.bench_vision SESSIONS.json [--gallery faces/gallery] [--emotion]
+      [--max-frames 300] [--json out.json] [--max-p95-ms 150] [--min-accuracy 0.9]
+
+SESSIONS.json lists recorded sessions and who should be recognized in them
+(null for a stranger who must not be recognized). Sources use the spec syntax
+of core.frame_source:
+  [
+    {"source": "video:sessions/sara_door.mp4", "expect": "Sara"},
+    {"source": "images:sessions/courier", "expect": null},
+    {"source": "synthetic:640x480?count=60", "expect": null}
+  ]
+
+Each session is replayed through the shared camera service
+(core.camera.use_frame_source), so the production code runs in pull mode:
+recognize() end to end for the time to first recognition, then
+analyze_frame() and, with --emotion, detect_emotion_from_face() frame by
+frame. Reports per-frame latency (p50/p95), time to first recognition and
+recognition accuracy. With --max-p95-ms / --min-accuracy the exit code is
+non-zero when a threshold is missed, so CI can catch regressions without a
+camera.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    vals = sorted(values)
+    k = max(0, min(len(vals) - 1, int(round(q * (len(vals) - 1)))))
+    return vals[k]
+
+
+def run_session(spec: str, expect: Optional[str], index, tolerance: float = 0.58,
+                max_frames: int = 300, with_emotion: bool = False) -> Dict[str, Any]:
+    from core.camera import release_camera, use_frame_source
+    from core.face_store import analyze_frame, new_tracker, recognize
+
+    detect_emotion = None
+    if with_emotion:
+        from core.emotion import detect_emotion_from_face as detect_emotion
+
+    first_name = None
+    first_s = None
+    first_frame = None
+    latencies: List[float] = []
+    face_frames = 0
+    correct_frames = 0
+    try:
+        # End to end: the greeting's recognize() over the replayed session.
+        if index is not None and len(index):
+            use_frame_source(spec)
+            t_start = time.perf_counter()
+            first_name = recognize(max_tries=max_frames, tolerance=tolerance, index=index)
+            if first_name:
+                first_s = time.perf_counter() - t_start
+
+        # Frame by frame: the same production steps, each frame timed on its own.
+        camera = use_frame_source(spec)
+        tracker = new_tracker()
+        for n, (seq, frame) in enumerate(camera.frames(max_frames)):
+            t0 = time.perf_counter()
+            boxes, encodings = analyze_frame(frame, tracker)
+            name = None
+            if encodings and index is not None and len(index):
+                name, _ = index.best(encodings, tolerance=tolerance)
+            if detect_emotion is not None and boxes:
+                detect_emotion(frame, boxes, frame_id=camera.frame_key(seq))
+            latencies.append(time.perf_counter() - t0)
+
+            if boxes:
+                face_frames += 1
+                if name == expect:
+                    correct_frames += 1
+            if name and first_frame is None:
+                first_frame = n
+    finally:
+        release_camera()
+
+    return {
+        "source": spec,
+        "expect": expect,
+        "recognized": first_name,
+        "correct": first_name == expect,
+        "frames": len(latencies),
+        "p50_ms": 1000.0 * _percentile(latencies, 0.5),
+        "p95_ms": 1000.0 * _percentile(latencies, 0.95),
+        "first_recognition_s": first_s,
+        "first_recognition_frame": first_frame,
+        "frame_accuracy": correct_frames / face_frames if face_frames else None,
+        "latencies_ms": [round(1000.0 * v, 3) for v in latencies],
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("sessions", help="JSON list of {source, expect}")
+    ap.add_argument("--gallery", default=None, help="Encodings store to match against (default: faces/gallery)")
+    ap.add_argument("--tolerance", type=float, default=0.58)
+    ap.add_argument("--max-frames", type=int, default=300)
+    ap.add_argument("--emotion", action="store_true", help="Include emotion classification in frame latency")
+    ap.add_argument("--json", default=None, help="Write full results to this file")
+    ap.add_argument("--max-p95-ms", type=float, default=None)
+    ap.add_argument("--min-accuracy", type=float, default=None)
+    args = ap.parse_args()
+
+    with open(args.sessions, "r", encoding="utf-8") as f:
+        sessions = json.load(f)
+    base = os.path.dirname(os.path.abspath(args.sessions))
+
+    if args.gallery:
+        from core.encoding_store import EncodingStore
+        index = EncodingStore(args.gallery).index()
+    else:
+        from core.face_store import gallery_index
+        index = gallery_index()
+
+    results = []
+    for s in sessions:
+        spec = s["source"]
+        kind, sep, path = spec.partition(":")
+        if sep and kind in ("video", "images") and not os.path.isabs(path):
+            spec = f"{kind}:{os.path.join(base, path)}"
+        results.append(run_session(spec, s.get("expect"), index, tolerance=args.tolerance,
+                                   max_frames=args.max_frames, with_emotion=args.emotion))
+
+    all_lat = [v for r in results for v in r["latencies_ms"]]
+    firsts = [r["first_recognition_s"] for r in results if r["first_recognition_s"] is not None and r["correct"]]
+    summary = {
+        "sessions": len(results),
+        "frames": len(all_lat),
+        "p50_ms": _percentile(all_lat, 0.5),
+        "p95_ms": _percentile(all_lat, 0.95),
+        "mean_first_recognition_s": sum(firsts) / len(firsts) if firsts else None,
+        "accuracy": sum(1 for r in results if r["correct"]) / len(results) if results else 0.0,
+    }
+
+    print(f"{'source':<40} {'expect':<12} {'got':<12} {'frames':>6} {'p50ms':>7} {'p95ms':>7} {'first_s':>8}")
+    for r in results:
+        first = f"{r['first_recognition_s']:.2f}" if r["first_recognition_s"] is not None else "-"
+        print(f"{r['source'][-40:]:<40} {str(r['expect']):<12} {str(r['recognized']):<12} "
+              f"{r['frames']:>6} {r['p50_ms']:>7.1f} {r['p95_ms']:>7.1f} {first:>8}")
+    mfr = summary["mean_first_recognition_s"]
+    print(f"Overall: {summary['frames']} frames, p50={summary['p50_ms']:.1f}ms, p95={summary['p95_ms']:.1f}ms, "
+          f"first recognition={'-' if mfr is None else f'{mfr:.2f}s'}, accuracy={summary['accuracy']:.0%}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "sessions": results}, f, indent=2)
+
+    failed = False
+    if args.max_p95_ms is not None and summary["p95_ms"] > args.max_p95_ms:
+        print(f"[FAIL] p95 frame latency {summary['p95_ms']:.1f}ms > {args.max_p95_ms}ms")
+        failed = True
+    if args.min_accuracy is not None and summary["accuracy"] < args.min_accuracy:
+        print(f"[FAIL] accuracy {summary['accuracy']:.0%} < {args.min_accuracy:.0%}")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
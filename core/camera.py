@@ -0,0 +1,264 @@
+"""
+Shared, long-lived camera capture service.
+
+One background thread owns the capture device and keeps grabbing frames, so
+face recognition, enrollment and emotion detection all read the latest frame
+without paying device init and auto-exposure warm-up on every call. When
+the device cannot be opened the thread keeps retrying with exponential
+back-off (up to 30 s), and reads fail at once instead of waiting for it.
+
+Replayed sources (video file, image folder, synthetic; see core.frame_source)
+are not grabbed in the background: each read pulls the next frame, so runs
+are deterministic and every recorded frame is processed.
+
+Environment:
+  TRAVIS_FRAME_SOURCE   -> source spec (default: the camera below)
+  TRAVIS_CAMERA_INDEX   -> device index (default 0)
+  TRAVIS_CAMERA_WIDTH   -> requested frame width (default 640)
+  TRAVIS_CAMERA_HEIGHT  -> requested frame height (default 480)
+"""
+
+import itertools
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from core.frame_source import is_live_spec, open_frame_source
+
+
+# Distinguishes frame ids of different CameraService instances (sources).
+_instances = itertools.count(1)
+
+
+class CameraService:
+    def __init__(self, index: int = 0, width: Optional[int] = 640, height: Optional[int] = 480,
+                 source: Optional[str] = None):
+        self.index = index
+        self.width = width
+        self.height = height
+        self.source = source if source else f"camera:{index}"
+        self._pull = not is_live_spec(self.source)
+        self._cap = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._cond = threading.Condition()
+        self._frame = None
+        self._seq = 0
+        self._stamp = 0.0
+        self._opened = threading.Event()
+        # Set while the device has failed to open; reads then fail at once.
+        self._open_failed = threading.Event()
+        self.token = next(_instances)
+
+    def start(self) -> "CameraService":
+        """Start the grab thread; returns immediately while the device opens."""
+        with self._cond:
+            if self._running:
+                return self
+            self._running = True
+            self._opened.clear()
+            if self._pull:
+                self._cap = self._open()
+                if self._cap is None:
+                    self._running = False
+                else:
+                    self._opened.set()
+                return self
+            self._thread = threading.Thread(target=self._run, name="camera-grab", daemon=True)
+            self._thread.start()
+        return self
+
+    def _open(self, log: bool = True):
+        try:
+            cap = open_frame_source(self.source, width=self.width, height=self.height)
+        except Exception as e:
+            if log:
+                print(f"[Camera] Could not open {self.source}: {e}")
+            return None
+        if not cap.isOpened():
+            cap.release()
+            return None
+        return cap
+
+    def _run(self, max_backoff: float = 30.0):
+        failures = 0
+        backoff = 1.0
+        while self._running:
+            if self._cap is None:
+                self._cap = self._open(log=not self._open_failed.is_set())
+                if self._cap is None:
+                    if not self._open_failed.is_set():
+                        print(f"[Camera] Could not open {self.source}; retrying in the background.")
+                        self._open_failed.set()
+                    with self._cond:
+                        self._cond.notify_all()
+                        if self._running:
+                            self._cond.wait(backoff)
+                    backoff = min(max_backoff, backoff * 2)
+                    continue
+                if self._open_failed.is_set():
+                    print(f"[Camera] Opened {self.source}.")
+                    self._open_failed.clear()
+                backoff = 1.0
+                self._opened.set()
+                failures = 0
+            ok, frame = self._cap.read()
+            if not ok or frame is None:
+                failures += 1
+                if failures >= 30:
+                    print("[Camera] Camera stopped delivering frames; reopening.")
+                    self._release_device()
+                else:
+                    time.sleep(0.01)
+                continue
+            failures = 0
+            with self._cond:
+                self._frame = frame
+                self._seq += 1
+                self._stamp = time.time()
+                self._cond.notify_all()
+        self._release_device()
+
+    def _release_device(self):
+        cap, self._cap = self._cap, None
+        self._opened.clear()
+        if cap is not None:
+            try:
+                cap.release()
+            except Exception:
+                pass
+
+    def is_running(self) -> bool:
+        return self._running
+
+    def wait_ready(self, timeout: float = 5.0) -> bool:
+        """Wait for the device to open; False at once if it has failed to."""
+        end = time.time() + max(0.0, timeout)
+        while not self._opened.is_set():
+            left = end - time.time()
+            if left <= 0 or self._open_failed.is_set():
+                return False
+            self._opened.wait(min(0.05, left))
+        return True
+
+    def read_frame(self, after: int = 0, timeout: float = 2.0) -> Tuple[int, Optional[object]]:
+        """Return (seq, frame) for the first frame newer than `after`.
+
+        seq is a monotonically increasing frame id; (0, None) on timeout.
+        """
+        if not self._running:
+            self.start()
+        if self._pull:
+            return self._pull_frame()
+        if self._open_failed.is_set() and not self._opened.is_set():
+            return 0, None
+        end = time.time() + max(0.0, timeout)
+        with self._cond:
+            while self._seq <= after:
+                left = end - time.time()
+                if left <= 0 or not self._running or self._open_failed.is_set():
+                    return 0, None
+                self._cond.wait(left)
+            return self._seq, self._frame
+
+    def _pull_frame(self) -> Tuple[int, Optional[object]]:
+        with self._cond:
+            if not self._running or self._cap is None:
+                return 0, None
+            ok, frame = self._cap.read()
+            if not ok or frame is None:
+                # Replay finished: behave like a camera that went away.
+                self._running = False
+                self._release_device()
+                return 0, None
+            self._frame = frame
+            self._seq += 1
+            self._stamp = time.time()
+            return self._seq, frame
+
+    def frame_key(self, seq: int):
+        """Id of frame `seq` that stays unique when the source is swapped or
+        the camera is recreated (seq restarts at 1 per instance); use it to
+        key per-frame caches."""
+        return (self.token, seq)
+
+    def read(self, timeout: float = 2.0):
+        """cv2.VideoCapture-style (ok, frame) for the latest frame."""
+        seq, frame = self.read_frame(timeout=timeout)
+        return frame is not None, frame
+
+    def latest(self, max_age: float = 0.5, timeout: float = 2.0):
+        """Latest frame if it is fresh enough, otherwise wait for the next one."""
+        if self._pull:
+            return self.read_frame()[1]
+        with self._cond:
+            if self._frame is not None and time.time() - self._stamp <= max_age:
+                return self._frame
+            seq = self._seq
+        return self.read_frame(after=seq, timeout=timeout)[1]
+
+    def frames(self, count: int, timeout: float = 2.0):
+        """Yield up to `count` distinct consecutive (seq, frame) pairs."""
+        if not self._pull:
+            self.wait_ready(5.0)
+        seq = 0
+        for _ in range(max(0, count)):
+            seq, frame = self.read_frame(after=seq, timeout=timeout)
+            if frame is None:
+                return
+            yield seq, frame
+
+    def burst(self, count: int, timeout: float = 2.0) -> List[object]:
+        return [frame for _, frame in self.frames(count, timeout=timeout)]
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+            if self._pull:
+                self._release_device()
+        t = self._thread
+        if t is not None and t is not threading.current_thread():
+            t.join(timeout=2.0)
+        self._thread = None
+
+
+_camera: Optional[CameraService] = None
+_camera_lock = threading.Lock()
+
+
+def get_camera() -> CameraService:
+    """Process-wide camera service (started on first use)."""
+    global _camera
+    with _camera_lock:
+        if _camera is None:
+            _camera = CameraService(
+                index=int(os.environ.get("TRAVIS_CAMERA_INDEX", "0")),
+                width=int(os.environ.get("TRAVIS_CAMERA_WIDTH", "640")) or None,
+                height=int(os.environ.get("TRAVIS_CAMERA_HEIGHT", "480")) or None,
+                source=os.environ.get("TRAVIS_FRAME_SOURCE") or None,
+            )
+        return _camera.start()
+
+
+def use_frame_source(spec: Optional[str]) -> CameraService:
+    """Swap the process-wide camera for another source (e.g. a recorded video)."""
+    global _camera
+    with _camera_lock:
+        if _camera is not None:
+            _camera.stop()
+        _camera = CameraService(
+            width=int(os.environ.get("TRAVIS_CAMERA_WIDTH", "640")) or None,
+            height=int(os.environ.get("TRAVIS_CAMERA_HEIGHT", "480")) or None,
+            source=spec,
+        )
+        return _camera.start()
+
+
+def release_camera():
+    global _camera
+    with _camera_lock:
+        if _camera is not None:
+            _camera.stop()
+            _camera = None
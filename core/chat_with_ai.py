@@ -1,68 +1,80 @@
 import datetime
-import requests
+import os
+import threading
+import time
 import urllib.parse
-from core.ollama_api import ask_ollama
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from core import http_client
+from core.ollama_api import stream_ollama, stream_sentences
 
 
 def _is_arabic(text: str) -> bool:
     return any('\u0600' <= ch <= '\u06FF' for ch in text or '')
 
 
-def _wiki_summary(prompt: str) -> str | None:
+def _wiki_langs(q: str) -> list:
+    return ["ar", "en"] if _is_arabic(q) else ["en", "ar"]
+
+
+def _wiki_summary_lang(prompt: str, lang: str, cancel: http_client.CancelScope | None = None) -> str | None:
     try:
         q = (prompt or "").strip()
         if not q:
             return None
 
-        langs = ["ar", "en"] if _is_arabic(q) else ["en", "ar"]
-        for lang in langs:
-            title = urllib.parse.quote(q)
-            url = f"https://{lang}.wikipedia.org/api/rest_v1/page/summary/{title}"
-            r = requests.get(url, timeout=8)
-            if r.status_code == 200:
-                data = r.json()
-                extract = data.get("extract")
-                if extract:
-                    return extract
-
-            r = requests.get(
-                f"https://{lang}.wikipedia.org/w/api.php",
-                params={
-                    "action": "opensearch",
-                    "search": q,
-                    "limit": 1,
-                    "namespace": 0,
-                    "format": "json",
-                },
-                timeout=8,
-            )
-            if r.status_code == 200:
-                data = r.json()
-                if len(data) >= 2 and data[1]:
-                    best = data[1][0]
-                    if best:
-                        title = urllib.parse.quote(best)
-                        url = f"https://{lang}.wikipedia.org/api/rest_v1/page/summary/{title}"
-                        r2 = requests.get(url, timeout=8)
-                        if r2.status_code == 200:
-                            extract = r2.json().get("extract")
-                            if extract:
-                                return extract
+        title = urllib.parse.quote(q)
+        url = f"https://{lang}.wikipedia.org/api/rest_v1/page/summary/{title}"
+        r = http_client.get(url, backend="wiki", cancel=cancel)
+        if r.status_code == 200:
+            data = r.json()
+            extract = data.get("extract")
+            if extract:
+                return extract
+
+        if cancel is not None and cancel.is_set():
+            return None
+        r = http_client.get(
+            f"https://{lang}.wikipedia.org/w/api.php",
+            backend="wiki",
+            cancel=cancel,
+            params={
+                "action": "opensearch",
+                "search": q,
+                "limit": 1,
+                "namespace": 0,
+                "format": "json",
+            },
+        )
+        if r.status_code == 200:
+            data = r.json()
+            if len(data) >= 2 and data[1]:
+                best = data[1][0]
+                if best and not (cancel is not None and cancel.is_set()):
+                    title = urllib.parse.quote(best)
+                    url = f"https://{lang}.wikipedia.org/api/rest_v1/page/summary/{title}"
+                    r2 = http_client.get(url, backend="wiki", cancel=cancel)
+                    if r2.status_code == 200:
+                        extract = r2.json().get("extract")
+                        if extract:
+                            return extract
     except Exception:
         return None
     return None
 
 
-def _duckduckgo_instant_answer(prompt: str) -> str | None:
+def _duckduckgo_instant_answer(prompt: str, cancel: http_client.CancelScope | None = None) -> str | None:
     try:
         q = (prompt or "").strip()
         if not q:
             return None
         url = "https://api.duckduckgo.com/"
-        r = requests.get(
+        r = http_client.get(
             url,
+            backend="ddg",
+            cancel=cancel,
             params={"q": q, "format": "json", "no_redirect": 1, "no_html": 1},
-            timeout=8,
         )
         if r.status_code == 200:
             data = r.json()
@@ -78,7 +90,11 @@ def _duckduckgo_instant_answer(prompt: str) -> str | None:
     return None
 
 
-def chat_with_ai(prompt: str) -> str:
+def stream_chat_enabled() -> bool:
+    return os.environ.get("TRAVIS_STREAM_CHAT", "1").lower() not in ("0", "false", "no", "off")
+
+
+def _quick_answer(prompt: str) -> str | None:
     p = (prompt or "").strip().lower()
 
 
@@ -89,21 +105,252 @@ def chat_with_ai(prompt: str) -> str:
 
     if any(k in p for k in ["weather", "forecast", "temperature"]):
         return "Today's weather is warm with some clouds."
+    return None
+
+
+NO_SOURCES_REPLY = (
+    "I couldn't reach my knowledge sources right now. "
+    "If you enable Ollama or internet access, I can give richer answers."
+)
+
+
+def _ollama_answer(prompt: str, cancel: http_client.CancelScope | None = None) -> str | None:
+    # Streamed, so a losing request is aborted instead of running to its timeout.
+    try:
+        resp = "".join(stream_ollama(prompt, cancel)).strip()
+    except Exception:
+        return None
+    return resp or None
+
+
+def _ddg_answer(prompt: str, cancel: http_client.CancelScope | None = None) -> str | None:
+    return _duckduckgo_instant_answer(prompt, cancel)
+
+
+def _backends(prompt: str, include_ollama: bool = True) -> list:
+    """(name, fn(prompt, cancel)) in priority order."""
+    backends = [("ollama", _ollama_answer)] if include_ollama else []
+    for lang in _wiki_langs((prompt or "").strip()):
+        backends.append((f"wiki:{lang}", lambda p, cancel=None, lang=lang: _wiki_summary_lang(p, lang, cancel)))
+    backends.append(("ddg", _ddg_answer))
+    return backends
+
+
+def resolve_mode() -> str:
+    return (os.environ.get("TRAVIS_CHAT_RESOLVE", "hedged") or "hedged").strip().lower()
+
+
+def _hedge_offsets(n: int) -> list:
+    """Launch offsets from TRAVIS_CHAT_HEDGE_DELAYS, the delays in seconds
+    between successive backend launches (the last value repeats)."""
+    raw = os.environ.get("TRAVIS_CHAT_HEDGE_DELAYS", "1.5,1,1")
+    gaps = [float(x) for x in raw.split(",") if x.strip()] or [0.0]
+    offsets = [0.0]
+    for i in range(1, n):
+        offsets.append(offsets[-1] + gaps[min(i - 1, len(gaps) - 1)])
+    return offsets
+
+
+# Seconds lower-ranked answers wait on a backend (from its launch) until it
+# has answered a few times and its own latency is known.
+DEFAULT_PATIENCE_S = {"ollama": 10.0, "wiki": 1.0, "ddg": 1.0}
 
+_latencies = {}
+_latencies_lock = threading.Lock()
 
-    resp = ask_ollama(prompt)
-    if resp and "I couldn't connect to my brain" not in resp:
-        return resp
 
-    wiki = _wiki_summary(prompt)
-    if wiki:
-        return wiki
+def _record_latency(name: str, seconds: float):
+    with _latencies_lock:
+        _latencies.setdefault(name.split(":")[0], deque(maxlen=50)).append(seconds)
 
-    ddg = _duckduckgo_instant_answer(prompt)
-    if ddg:
-        return ddg
 
-    return (
-        "I couldn't reach my knowledge sources right now. "
-        "If you enable Ollama or internet access, I can give richer answers."
-    )
+def _patience(name: str) -> float:
+    """How long an answer from a lower-ranked backend waits on `name` after
+    `name` was launched.
+
+    TRAVIS_CHAT_PATIENCE_<BACKEND> when set, else 1.5x the backend's recent
+    p95 answer time (after 3 answers), else DEFAULT_PATIENCE_S; never below
+    TRAVIS_CHAT_PREFER_S and never beyond the backend's read timeout.
+    """
+    env = os.environ.get
+    backend = name.split(":")[0]
+    floor = float(env("TRAVIS_CHAT_PREFER_S", "1"))
+    ceiling = http_client.timeouts(backend)[1]
+    explicit = env(f"TRAVIS_CHAT_PATIENCE_{backend.upper()}")
+    if explicit:
+        return max(floor, float(explicit))
+    with _latencies_lock:
+        history = sorted(_latencies.get(backend, ()))
+    if len(history) >= 3:
+        expected = 1.5 * history[min(len(history) - 1, int(round(0.95 * (len(history) - 1))))]
+    else:
+        expected = DEFAULT_PATIENCE_S.get(backend, floor)
+    return max(floor, min(expected, ceiling))
+
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="chat-resolve")
+
+
+def resolve_answer(prompt: str, include_ollama: bool = True, deadline_s: float | None = None) -> str | None:
+    """First acceptable answer from the knowledge backends, or None.
+
+    TRAVIS_CHAT_RESOLVE picks the strategy:
+      sequential -> one backend after another (the old behaviour)
+      parallel   -> all backends at once
+      hedged     -> staggered by TRAVIS_CHAT_HEDGE_DELAYS; the next backend
+                    also starts early when nothing is in flight (default)
+    Backends rank ollama, Wikipedia (question language first), DuckDuckGo.
+    An answer wins once every higher-ranked backend has failed or has run
+    past its own patience (see _patience), so a slow but healthy Ollama is
+    not beaten by Wikipedia. All work stops at TRAVIS_CHAT_DEADLINE (default
+    12 s, stretched to cover the top backend's patience); then every request
+    still in flight is aborted through a shared http_client.CancelScope.
+    """
+    backends = _backends(prompt, include_ollama)
+    mode = resolve_mode()
+    if mode == "sequential":
+        for name, fn in backends:
+            answer = fn(prompt)
+            if answer:
+                return answer
+        return None
+
+    n = len(backends)
+    if n == 0:
+        return None
+    offsets = _hedge_offsets(n) if mode == "hedged" else [0.0] * n
+    patience = [_patience(name) for name, _ in backends]
+    if deadline_s is None:
+        deadline_s = os.environ.get("TRAVIS_CHAT_DEADLINE")
+        deadline_s = float(deadline_s) if deadline_s else max(12.0, offsets[0] + patience[0] + 1.0)
+    start = time.monotonic()
+    launch_at = [start + o for o in offsets]
+    started = [None] * n
+    futures = [None] * n
+    results = {}
+    cancel = http_client.CancelScope()
+
+    def win(i, now):
+        print(f"[Chat] Answer from {backends[i][0]} in {now - start:.2f}s.")
+        return results[i]
+
+    try:
+        while True:
+            now = time.monotonic()
+            for i, f in enumerate(futures):
+                if f is not None and f.done() and i not in results:
+                    try:
+                        results[i] = f.result()
+                    except Exception:
+                        results[i] = None
+                    if results[i]:
+                        _record_latency(backends[i][0], now - started[i])
+            if now >= start + deadline_s:
+                print(f"[Chat] No preferred answer within {deadline_s:.1f}s.")
+                break
+            # No point waiting out a hedge delay when nothing is in flight.
+            if all(f is None or i in results for i, f in enumerate(futures)):
+                nxt = next((i for i in range(n) if futures[i] is None), None)
+                if nxt is not None:
+                    launch_at[nxt] = min(launch_at[nxt], now)
+            for i, (name, fn) in enumerate(backends):
+                if futures[i] is None and now >= launch_at[i]:
+                    started[i] = now
+                    futures[i] = _executor.submit(fn, prompt, cancel=cancel)
+
+            # The first backend still worth waiting for: not launched yet, or
+            # running within its patience. Answers ranked above it can win.
+            blocking = next((i for i in range(n) if i not in results
+                             and (started[i] is None or now < started[i] + patience[i])), n)
+            for j in range(blocking):
+                if results.get(j):
+                    return win(j, now)
+            if len(results) == n:
+                return None
+
+            pending = [f for i, f in enumerate(futures) if f is not None and i not in results]
+            wake = [t for i, t in enumerate(launch_at) if futures[i] is None] + [start + deadline_s]
+            wake += [started[i] + patience[i] for i in range(n)
+                     if started[i] is not None and i not in results and started[i] + patience[i] > now]
+            timeout = max(0.01, min(wake) - time.monotonic())
+            if pending:
+                wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            else:
+                time.sleep(timeout)
+    finally:
+        cancel.set()
+        for f in futures:
+            if f is not None:
+                f.cancel()
+
+    for i in range(n):
+        if results.get(i):
+            return results[i]
+    return None
+
+
+def _fallback_answer(prompt: str) -> str:
+    return resolve_answer(prompt, include_ollama=False) or NO_SOURCES_REPLY
+
+
+def chat_with_ai(prompt: str) -> str:
+    quick = _quick_answer(prompt)
+    if quick:
+        return quick
+
+    return resolve_answer(prompt) or NO_SOURCES_REPLY
+
+
+def speak_chat_reply(prompt: str, speak) -> str:
+    """Answer `prompt` aloud and return the full reply.
+
+    With TRAVIS_STREAM_CHAT on (default), the Ollama reply is streamed and
+    each sentence is queued for speech as soon as it is complete, while the
+    rest is still generating; `speak` must accept block=False and return a
+    Future (core.voice_assistant.speak). Returns once the last sentence has
+    been spoken. A barge-in (a sentence cancelled or cut off) aborts the
+    Ollama stream, so nothing more of the answer is queued.
+    """
+    quick = _quick_answer(prompt)
+    if quick:
+        speak(quick)
+        return quick
+    if not stream_chat_enabled():
+        reply = chat_with_ai(prompt)
+        speak(reply)
+        return reply
+
+    spoken = []
+    last = None
+    interrupted = http_client.CancelScope()
+
+    def on_spoken(fut):
+        # Cancelled while queued, or spoken=False because it was cut off.
+        if fut.cancelled() or (fut.exception() is None and fut.result() is False):
+            interrupted.set()
+
+    try:
+        for sentence in stream_sentences(prompt, interrupted):
+            if interrupted.is_set():
+                break
+            last = speak(sentence, block=False)
+            spoken.append(sentence)
+            if last is not None:
+                last.add_done_callback(on_spoken)
+    except Exception as e:
+        if not interrupted.is_set():
+            print(f"[Chat] Ollama stream failed: {e}")
+    if interrupted.is_set():
+        print("[Chat] Reply interrupted.")
+        return " ".join(spoken)
+    if spoken:
+        if last is not None:
+            try:
+                last.result()
+            except Exception:
+                pass
+        return " ".join(spoken)
+
+    reply = _fallback_answer(prompt)
+    speak(reply)
+    return reply
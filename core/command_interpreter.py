@@ -1,4 +1,4 @@
-from core.chat_with_ai import chat_with_ai
+from core.chat_with_ai import speak_chat_reply
 from core.analyze import analyze_command
 from core.device_api import execute_device_action
 from core.face_store import recognize, capture_and_add, get_owner_name
@@ -181,6 +181,12 @@ def handle_command(text, serial_bridge, speak, owner_name=None):
             return
 
 
+    if kind == "ai_query" and parsed.get("question"):
+        # Plain questions skip the blocking JSON parser, so the reply can be
+        # spoken sentence by sentence while Ollama is still generating it.
+        speak_chat_reply(parsed.get("prompt", text), speak)
+        return
+
     ai_result = interpret_with_ai(text)
 
 
@@ -253,8 +259,7 @@ def handle_command(text, serial_bridge, speak, owner_name=None):
     if speak_text:
         speak(speak_text)
     else:
-        reply = chat_with_ai(parsed.get("prompt", text))
-        speak(reply)
+        speak_chat_reply(parsed.get("prompt", text), speak)
 
 
 def execute_action(command, serial_bridge, speak):
@@ -0,0 +1,115 @@
+"""
+Early intent dispatch on streaming partial transcripts.
+
+Device commands ("open the door", "اطفئ النور") are parsed from Vosk's
+partial hypotheses and sent before the user stops speaking, but only once
+the parsed command has held steady: the same complete device intent on
+several consecutive partials and for a minimum time, with no negation in
+the text. When the final transcript parses to the command that was already
+sent, it is not handled a second time.
+
+Environment:
+  TRAVIS_EARLY_DISPATCH         -> 0 to disable (default 1)
+  TRAVIS_EARLY_STABLE_MS        -> how long an intent must hold (default 300)
+  TRAVIS_EARLY_STABLE_PARTIALS  -> consecutive partials with that intent (default 3)
+"""
+
+import os
+import time
+from typing import Optional, Tuple
+
+from core.analyze import analyze_command
+from core.device_api import execute_device_action
+
+
+# A negation can flip a command that has already parsed ("don't open the door").
+NEGATIONS = (" don't ", " dont ", " do not ", " not ", " never ", " لا ", " ما ", " مو ")
+
+
+def early_dispatch_enabled() -> bool:
+    return os.environ.get("TRAVIS_EARLY_DISPATCH", "1").lower() not in ("0", "false", "no", "off")
+
+
+def device_intent(text: str) -> Optional[Tuple[str, str, Optional[str]]]:
+    """(device, action, level) when `text` is a complete device command."""
+    parsed = analyze_command(text)
+    if parsed.get("type") != "device_control":
+        return None
+    if not parsed.get("device") or not parsed.get("action"):
+        return None
+    return parsed.get("device"), parsed.get("action"), parsed.get("level")
+
+
+class EarlyDispatcher:
+    def __init__(self, serial_bridge, stable_ms: Optional[int] = None,
+                 stable_partials: Optional[int] = None):
+        env = os.environ.get
+        self.serial = serial_bridge
+        self.stable_s = (stable_ms if stable_ms is not None else int(env("TRAVIS_EARLY_STABLE_MS", "300"))) / 1000.0
+        self.stable_partials = (stable_partials if stable_partials is not None
+                                else int(env("TRAVIS_EARLY_STABLE_PARTIALS", "3")))
+        self.dispatched: Optional[Tuple[str, str, Optional[str]]] = None
+        self._candidate = None
+        self._since = 0.0
+        self._count = 0
+
+    def feed(self, partial: str) -> bool:
+        """Fold in one partial hypothesis; True if it triggered the command."""
+        if self.dispatched is not None:
+            return False
+        low = f" {partial.lower()} "
+        intent = None if any(n in low for n in NEGATIONS) else device_intent(partial)
+        now = time.monotonic()
+        if intent != self._candidate:
+            self._candidate = intent
+            self._since = now
+            self._count = 0
+        if intent is None:
+            return False
+        self._count += 1
+        if self._count < self.stable_partials or now - self._since < self.stable_s:
+            return False
+        self._dispatch(intent, partial)
+        return True
+
+    def finish(self, text: str) -> bool:
+        """True when the final transcript was already handled early."""
+        if self.dispatched is None:
+            return False
+        return not text.strip() or device_intent(text) == self.dispatched
+
+    def _dispatch(self, intent, text: str):
+        device, action, level = intent
+        print(f"[EarlyDispatch] {device} {action}{' ' + level if level else ''} from partial: {text!r}")
+        self.dispatched = intent
+        execute_device_action({"action": action, "device": device, "level": level}, self.serial)
+
+
+def listen_and_dispatch(serial_bridge, timeout_seconds: int = 8, **stream_kwargs) -> Tuple[str, bool]:
+    """listen() that may act on a device command early.
+
+    Returns (final text, handled); when handled is True the command was
+    already executed from a stable partial. `stream_kwargs` go to
+    SpeechInputEngine.listen_stream (start_at, preroll_ms, strip_word).
+    """
+    from core.voice_assistant import listen
+
+    try:
+        from core.speech_input import get_speech_input
+        engine = get_speech_input()
+        engine.start()
+    except Exception:
+        # No microphone or model: the plain listen() falls back to the keyboard.
+        return listen(timeout_seconds), False
+
+    dispatcher = EarlyDispatcher(serial_bridge) if early_dispatch_enabled() else None
+    text = ''
+    try:
+        for kind, hyp in engine.listen_stream(timeout_seconds, **stream_kwargs):
+            if kind == "final":
+                text = hyp
+            elif dispatcher is not None:
+                dispatcher.feed(hyp)
+    except Exception as e:
+        print(f"[EarlyDispatch] Listening failed: {e}")
+    return text, dispatcher is not None and dispatcher.finish(text)
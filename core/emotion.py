@@ -1,5 +1,14 @@
 import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
 import cv2
+import numpy as np
+
+from core.camera import get_camera
+from core.face_detectors import box_area, crop_face, get_detector
 
 
 def _map_emotion(label: str) -> str:
@@ -19,94 +28,373 @@ def _map_emotion(label: str) -> str:
     return "neutral"
 
 
-def _try_deepface(frame_bgr):
-    try:
+# Output order of the DeepFace and FER emotion nets.
+EMOTION_LABELS = ("angry", "disgust", "fear", "happy", "sad", "surprise", "neutral")
+
+
+class _EmotionModel:
+    """Emotion backends built once, warmed on a dummy face and reused.
+
+    TRAVIS_EMOTION_BACKEND picks auto | deepface | fer (default auto: DeepFace
+    first, FER as per-call fallback).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.deepface = None
+        self.deepface_net = None
+        self.fer = None
+        self.backend: Optional[str] = None
+        self.warmup_seconds: Optional[float] = None
+
+    def _load_deepface(self):
         from deepface import DeepFace
-    except Exception as e:
-        print(f"[Emotion] DeepFace not available: {e}")
+        try:
+            client = DeepFace.build_model(task="facial_attribute", model_name="Emotion")
+        except TypeError:
+            client = DeepFace.build_model("Emotion")
+        # Newer DeepFace wraps the Keras net in a client object.
+        self.deepface_net = getattr(client, "model", client)
+        return DeepFace
+
+    def _load_fer(self):
+        from fer import FER
+        return FER(mtcnn=False)
+
+    def load(self) -> "_EmotionModel":
+        with self._lock:
+            if self._ready.is_set():
+                return self
+            t0 = time.perf_counter()
+            pref = (os.environ.get("TRAVIS_EMOTION_BACKEND", "auto") or "auto").strip().lower()
+            if pref in ("auto", "deepface"):
+                try:
+                    self.deepface = self._load_deepface()
+                except Exception as e:
+                    print(f"[Emotion] DeepFace not available: {e}")
+            if pref == "fer" or (pref == "auto" and self.deepface is None):
+                try:
+                    self.fer = self._load_fer()
+                except Exception as e:
+                    print(f"[Emotion] FER not available: {e}")
+            self.backend = "deepface" if self.deepface is not None else ("fer" if self.fer is not None else None)
+
+            # One forward pass so graph construction isn't paid by the first greeting.
+            if self.backend:
+                dummy = np.full((64, 64, 3), 128, dtype=np.uint8)
+                self._classify(dummy, is_face_crop=True, quiet=True)
+            self.warmup_seconds = time.perf_counter() - t0
+            if self.backend:
+                print(f"[Emotion] {self.backend} model ready in {self.warmup_seconds:.2f}s")
+            self._ready.set()
+            return self
+
+    def warm_up(self, background: bool = True):
+        if self._ready.is_set():
+            return
+        if not background:
+            self.load()
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self.load, name="emotion-warmup", daemon=True)
+            self._thread.start()
+
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def _deepface_analyze(self, frame_bgr, is_face_crop: bool, quiet: bool = False):
+        try:
+            kwargs = {"detector_backend": "skip"} if is_face_crop else {}
+            res = self.deepface.analyze(frame_bgr, actions=["emotion"], enforce_detection=False, **kwargs)
+
+            if isinstance(res, list) and res:
+                res = res[0]
+            emo = (res or {}).get("dominant_emotion")
+            scores = (res or {}).get("emotion") or {}
+            if emo:
+                return emo, float(scores.get(emo, 0.0))
+        except Exception as e:
+            if not quiet:
+                print(f"[Emotion] DeepFace analyze failed: {e}")
         return None
-    try:
-        res = DeepFace.analyze(frame_bgr, actions=["emotion"], enforce_detection=False)
 
-        if isinstance(res, list) and res:
-            res = res[0]
-        emo = (res or {}).get("dominant_emotion")
-        scores = (res or {}).get("emotion") or {}
-        if emo:
-            return emo, float(scores.get(emo, 0.0))
-    except Exception as e:
-        print(f"[Emotion] DeepFace analyze failed: {e}")
-    return None
+    def _fer_analyze(self, frame_bgr, is_face_crop: bool, quiet: bool = False):
+        try:
+            if is_face_crop:
+                h, w = frame_bgr.shape[:2]
+                faces = self.fer.detect_emotions(frame_bgr, face_rectangles=[(0, 0, w, h)])
+                if not faces:
+                    return None
+                scores = faces[0].get("emotions") or {}
+                if not scores:
+                    return None
+                label = max(scores, key=scores.get)
+                return label, float(scores[label])
+            return self.fer.top_emotion(frame_bgr)
+        except Exception as e:
+            if not quiet:
+                print(f"[Emotion] FER analyze failed: {e}")
+            return None
 
+    def _classify(self, frame_bgr, is_face_crop: bool = False, quiet: bool = False):
+        got = None
+        if self.deepface is not None:
+            got = self._deepface_analyze(frame_bgr, is_face_crop, quiet)
+        if not got:
+            if self.fer is None and self.deepface is not None:
+                # DeepFace failed on this input; build FER once as the fallback.
+                try:
+                    self.fer = self._load_fer()
+                except Exception:
+                    self.fer = False
+            if self.fer:
+                got = self._fer_analyze(frame_bgr, is_face_crop, quiet)
+        return got
 
-def _try_fer(frame_bgr):
-    try:
-        from fer import FER
-    except Exception as e:
-        print(f"[Emotion] FER not available: {e}")
+    def classify(self, frame_bgr, is_face_crop: bool = False):
+        """(raw_label, score) or None."""
+        self.load()
+        return self._classify(frame_bgr, is_face_crop)
+
+    def _predict_batch(self, net, crops, size, preprocess):
+        batch = []
+        for crop in crops:
+            gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+            gray = cv2.resize(gray, size).astype(np.float32)
+            batch.append(preprocess(gray))
+        x = np.stack(batch)[..., np.newaxis]
+        try:
+            preds = net.predict(x, verbose=0)
+        except TypeError:
+            preds = net.predict(x)
+        return np.asarray(preds, dtype=np.float64)
+
+    def _deepface_batch(self, crops):
+        # Same input as DeepFace's Emotion client: 48x48 grayscale in [0, 1].
+        preds = self._predict_batch(self.deepface_net, crops, (48, 48), lambda g: g / 255.0)
+        out = []
+        for p in preds:
+            total = float(p.sum()) or 1.0
+            i = int(np.argmax(p))
+            out.append((EMOTION_LABELS[i], 100.0 * float(p[i]) / total))
+        return out
+
+    def _fer_batch(self, crops):
+        net = getattr(self.fer, "_FER__emotion_classifier", None)
+        size = tuple(getattr(self.fer, "_FER__emotion_target_size", (64, 64)))
+        if net is None:
+            return [self._fer_analyze(c, True) for c in crops]
+        # FER's own preprocessing: scale to [-1, 1].
+        preds = self._predict_batch(net, crops, size, lambda g: (g / 255.0 - 0.5) * 2.0)
+        out = []
+        for p in preds:
+            i = int(np.argmax(p))
+            out.append((EMOTION_LABELS[i], round(float(p[i]), 2)))
+        return out
+
+    def classify_batch(self, crops):
+        """Classify face crops in one forward pass; list of (raw_label, score) or None."""
+        self.load()
+        if not crops:
+            return []
+        try:
+            if self.deepface_net is not None and hasattr(self.deepface_net, "predict"):
+                return self._deepface_batch(crops)
+            if self.fer:
+                return self._fer_batch(crops)
+        except Exception as e:
+            print(f"[Emotion] Batched inference failed, classifying one by one: {e}")
+        return [self._classify(c, is_face_crop=True) for c in crops]
+
+
+_model = _EmotionModel()
+
+
+def warm_up(background: bool = True):
+    """Build and warm the emotion model (in a background thread by default)."""
+    _model.warm_up(background)
+
+
+def is_ready() -> bool:
+    return _model.is_ready()
+
+
+def warmup_seconds() -> Optional[float]:
+    """Seconds the last warm-up took, or None if it hasn't finished."""
+    return _model.warmup_seconds if _model.is_ready() else None
+
+
+def classify_face(face_bgr):
+    """Classify an already-cropped face; returns (mapped_emotion, score) or None."""
+    if face_bgr is None or not getattr(face_bgr, "size", 0):
         return None
-    try:
-        detector = FER(mtcnn=False)
-        result = detector.top_emotion(frame_bgr)
-        return result
-    except Exception as e:
-        print(f"[Emotion] FER analyze failed: {e}")
+    got = _model.classify(face_bgr, is_face_crop=True)
+    if not got or not got[0]:
         return None
+    label, score = got
+    return _map_emotion(label), float(score or 0.0)
 
 
-def detect_emotion_from_face():
-    frames_to_sample = int(os.environ.get("TRAVIS_EMOTION_FRAMES", "5"))
+def classify_faces(crops):
+    """Classify several face crops in one batched call.
+
+    Returns a list aligned with `crops` of (mapped_emotion, score) or None.
+    """
+    keep = [i for i, c in enumerate(crops) if c is not None and getattr(c, "size", 0)]
+    out = [None] * len(crops)
+    for i, got in zip(keep, _model.classify_batch([crops[i] for i in keep])):
+        if got and got[0]:
+            out[i] = (_map_emotion(got[0]), float(got[1] or 0.0))
+    return out
 
-    cam = cv2.VideoCapture(0)
+
+def aggregate_votes(samples):
+    """Score-weighted vote over (mapped_emotion, score) samples."""
+    votes = {}
+    for mapped, score in samples:
+        votes[mapped] = votes.get(mapped, 0) + float(score or 0.0)
+    if not votes:
+        return None, 0.0
+    final = max(votes.items(), key=lambda kv: kv[1])[0]
+    return final, votes[final]
+
+
+_CROP_CACHE_SIZE = 32
+_crop_cache: "OrderedDict" = OrderedDict()
+_crop_lock = threading.Lock()
+
+
+def _align_and_crop(frame_bgr, box, margin: float = 0.15):
+    """Rotate the face so the eyes are level, then crop it with a margin."""
+    top, right, bottom, left = box
+    h, w = frame_bgr.shape[:2]
+    # Rotate a padded region so the corners of the crop stay filled.
+    pad_y, pad_x = int((bottom - top) * 0.4), int((right - left) * 0.4)
+    t, b = max(0, top - pad_y), min(h, bottom + pad_y)
+    l, r = max(0, left - pad_x), min(w, right + pad_x)
+    region = frame_bgr[t:b, l:r]
+    local = (top - t, right - l, bottom - t, left - l)
+    if region.size == 0:
+        return None
     try:
+        import face_recognition
+        rgb = np.ascontiguousarray(cv2.cvtColor(region, cv2.COLOR_BGR2RGB))
+        marks = face_recognition.face_landmarks(rgb, [local], model="small")
+        if marks:
+            eyes = [np.mean(marks[0][k], axis=0) for k in ("left_eye", "right_eye")]
+            p1, p2 = sorted(eyes, key=lambda p: p[0])
+            angle = float(np.degrees(np.arctan2(p2[1] - p1[1], p2[0] - p1[0])))
+            if abs(angle) > 1.0:
+                center = ((local[1] + local[3]) / 2.0, (local[0] + local[2]) / 2.0)
+                m = cv2.getRotationMatrix2D(center, angle, 1.0)
+                region = cv2.warpAffine(region, m, (region.shape[1], region.shape[0]),
+                                        borderMode=cv2.BORDER_REPLICATE)
+    except Exception:
+        pass
+    return crop_face(region, local, margin)
+
+
+def face_crop(frame_bgr, box, frame_id=None):
+    """Aligned crop of one detected face.
+
+    Crops are cached per (frame_id, box), so callers that share a frame id
+    (the greeting pipeline, the monitor, benchmarks) only align each face once.
+    `frame_id` must be unique across sources, e.g. CameraService.frame_key(seq).
+    """
+    align = os.environ.get("TRAVIS_EMOTION_ALIGN", "1") not in ("0", "false", "no")
+    key = (frame_id, tuple(int(v) for v in box)) if frame_id is not None else None
+    if key is not None:
+        with _crop_lock:
+            crop = _crop_cache.get(key)
+            if crop is not None:
+                _crop_cache.move_to_end(key)
+                return crop
+    crop = _align_and_crop(frame_bgr, box) if align else crop_face(frame_bgr, box)
+    if crop is not None:
+        # Copy so the cached crop does not pin the whole frame in memory.
+        crop = crop.copy()
+        if key is not None:
+            with _crop_lock:
+                _crop_cache[key] = crop
+                while len(_crop_cache) > _CROP_CACHE_SIZE:
+                    _crop_cache.popitem(last=False)
+    return crop
+
+
+def classify_boxes(frame_bgr, boxes, frame_id=None):
+    """Emotion for each face box from an upstream detector, in one batch.
+
+    Only the aligned face crops are classified; returns a list aligned with
+    `boxes` of (mapped_emotion, score) or None.
+    """
+    return classify_faces([face_crop(frame_bgr, box, frame_id) for box in boxes])
+
+
+def _detect_boxes(frame_bgr):
+    try:
+        return get_detector().detect(cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB))
+    except Exception:
+        return []
 
-        try:
-            cam.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            cam.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        except Exception:
-            pass
-
-        votes = {}
-        best = ("neutral", 0.0)
-        for _ in range(max(1, frames_to_sample)):
-            ok, frame = cam.read()
-            if not ok:
-                continue
-
-
-            try:
-                h, w = frame.shape[:2]
-                scale = 480.0 / max(h, w)
-                if scale < 1.0:
-                    frame_bgr = cv2.resize(frame, (int(w * scale), int(h * scale)))
-                else:
-                    frame_bgr = frame
-            except Exception:
-                frame_bgr = frame
 
+def detect_emotion_from_face(frame=None, boxes=None, frame_id=None):
+    """Mapped emotion of the largest face.
 
-            got = _try_deepface(frame_bgr)
-            if not got:
-                got = _try_fer(frame_bgr)
-            if not got:
-                continue
+    With `frame` (and optionally `boxes` from an upstream detector), only that
+    frame is classified; otherwise TRAVIS_EMOTION_FRAMES camera frames are
+    sampled and voted on. Frames without a detected face are skipped rather
+    than classified as background.
+    """
+    if frame is not None:
+        if boxes is None:
+            boxes = _detect_boxes(frame)
+        if boxes:
+            got = classify_boxes(frame, [max(boxes, key=box_area)], frame_id)[0]
+            if got:
+                return got[0]
+        return "neutral"
 
-            label, score = got
-            mapped = _map_emotion(label)
-            votes[mapped] = votes.get(mapped, 0) + float(score or 0.0)
-            if (score or 0.0) > best[1]:
-                best = (mapped, float(score or 0.0))
+    frames_to_sample = int(os.environ.get("TRAVIS_EMOTION_FRAMES", "5"))
+    batched = os.environ.get("TRAVIS_EMOTION_BATCH", "1") not in ("0", "false", "no")
 
-        if votes:
+    samples = []
+    crops = []
+    camera = get_camera()
+    for seq, frame in camera.frames(max(1, frames_to_sample)):
 
-            final = max(votes.items(), key=lambda kv: kv[1])[0]
-            print(f"[Emotion] Detected: {final} ({votes[final]:.2f} agg)")
-            return final
-        else:
-            print("[Emotion] Could not detect emotion. Falling back to neutral.")
-            return "neutral"
-    finally:
         try:
-            cam.release()
+            h, w = frame.shape[:2]
+            scale = 480.0 / max(h, w)
+            if scale < 1.0:
+                frame_bgr = cv2.resize(frame, (int(w * scale), int(h * scale)))
+            else:
+                frame_bgr = frame
         except Exception:
-            pass
+            frame_bgr = frame
+
+        boxes = _detect_boxes(frame_bgr)
+        if not boxes:
+            continue
+        crop = face_crop(frame_bgr, max(boxes, key=box_area), frame_id=("emotion",) + camera.frame_key(seq))
+        if batched:
+            crops.append(crop)
+            continue
+
+        got = classify_face(crop)
+        if got:
+            samples.append(got)
+
+    if crops:
+        samples.extend(got for got in classify_faces(crops) if got)
+
+    final, agg = aggregate_votes(samples)
+    if final:
+        print(f"[Emotion] Detected: {final} ({agg:.2f} agg)")
+        return final
+    else:
+        print("[Emotion] Could not detect emotion. Falling back to neutral.")
+        return "neutral"
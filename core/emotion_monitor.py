@@ -0,0 +1,118 @@
+"""
+Continuous low-rate emotion monitoring for adaptive lighting.
+
+A background thread samples the shared camera at a low frame rate,
+classifies the largest face and smooths the per-emotion scores with an
+exponential moving average. An `emotion ...` serial command is sent only
+when the smoothed state changes and maps to a different command, with a
+minimum hold time so the lights do not flicker. The sampling period
+stretches whenever the CPU used per sample would exceed its budget.
+
+Environment:
+  TRAVIS_EMOTION_MONITOR          -> 1 to start it from travis_main (default off)
+  TRAVIS_EMOTION_MONITOR_FPS      -> samples per second (default 0.2)
+  TRAVIS_EMOTION_MONITOR_ALPHA    -> EMA weight of a new sample (default 0.3)
+  TRAVIS_EMOTION_MONITOR_CPU      -> max share of one core (default 0.1)
+  TRAVIS_EMOTION_MONITOR_HOLD_S   -> min seconds between changes (default 60)
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import cv2
+
+
+def monitor_enabled() -> bool:
+    return os.environ.get("TRAVIS_EMOTION_MONITOR", "0").lower() in ("1", "true", "yes", "on")
+
+
+class EmotionMonitor:
+    def __init__(self, serial_bridge, to_command: Callable[[str], str],
+                 initial: str = "neutral", fps: Optional[float] = None,
+                 alpha: Optional[float] = None, cpu_budget: Optional[float] = None,
+                 min_hold_s: Optional[float] = None, margin: float = 0.1):
+        env = os.environ.get
+        self.serial = serial_bridge
+        self.to_command = to_command
+        self.fps = fps if fps is not None else float(env("TRAVIS_EMOTION_MONITOR_FPS", "0.2"))
+        self.alpha = alpha if alpha is not None else float(env("TRAVIS_EMOTION_MONITOR_ALPHA", "0.3"))
+        self.cpu_budget = cpu_budget if cpu_budget is not None else float(env("TRAVIS_EMOTION_MONITOR_CPU", "0.1"))
+        self.min_hold_s = min_hold_s if min_hold_s is not None else float(env("TRAVIS_EMOTION_MONITOR_HOLD_S", "60"))
+        self.margin = margin
+        self.state = initial or "neutral"
+        self.scores: Dict[str, float] = {self.state: 1.0}
+        self.last_command = to_command(self.state)
+        self._changed_at = time.monotonic()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "EmotionMonitor":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="emotion-monitor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _sample(self):
+        from core.camera import get_camera
+        from core.emotion import classify_boxes
+        from core.face_detectors import box_area, get_detector
+
+        camera = get_camera()
+        seq, frame = camera.read_frame(timeout=2.0)
+        if frame is None:
+            return None
+        boxes = get_detector().detect(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        if not boxes:
+            return None
+        return classify_boxes(frame, [max(boxes, key=box_area)], frame_id=camera.frame_key(seq))[0]
+
+    def update(self, label: str, score: float):
+        """Fold one observation into the EMA; returns the new state if it changed."""
+        # DeepFace reports percentages, FER reports 0..1.
+        conf = score / 100.0 if score > 1.0 else score
+        conf = max(0.0, min(1.0, conf))
+        for k in list(self.scores):
+            self.scores[k] *= (1.0 - self.alpha)
+        self.scores[label] = self.scores.get(label, 0.0) + self.alpha * conf
+
+        best = max(self.scores, key=self.scores.get)
+        if best == self.state:
+            return None
+        if self.scores[best] - self.scores.get(self.state, 0.0) < self.margin:
+            return None
+        if time.monotonic() - self._changed_at < self.min_hold_s:
+            return None
+        self.state = best
+        self._changed_at = time.monotonic()
+        return best
+
+    def _run(self):
+        period = 1.0 / max(1e-3, self.fps)
+        while not self._stop.is_set():
+            started = time.monotonic()
+            # Process CPU, since model inference runs on the backend's own threads;
+            # it also counts other threads, which only errs on the cautious side.
+            cpu0 = time.process_time()
+            try:
+                got = self._sample()
+                if got:
+                    changed = self.update(*got)
+                    if changed:
+                        cmd = self.to_command(changed)
+                        if cmd != self.last_command:
+                            self.last_command = cmd
+                            print(f"[EmotionMonitor] Mood is now {changed}.")
+                            if self.serial is not None and self.serial.is_connected():
+                                self.serial.send(cmd)
+            except Exception as e:
+                print(f"[EmotionMonitor] Sample failed: {e}")
+            cpu = time.process_time() - cpu0
+            # Stretch the period so cpu / period stays within the budget.
+            wait = max(period, cpu / max(1e-3, self.cpu_budget)) - (time.monotonic() - started)
+            self._stop.wait(max(0.05, wait))
@@ -0,0 +1,345 @@
+"""
+Memory-mapped, versioned store for face encodings.
+
+Layout (inside the store directory):
+  manifest.json     -> names, segment files, row offsets/counts, generation
+  seg-<gen>.npy     -> append-only blocks of float64 embeddings
+
+Each commit writes only the new vectors into a fresh segment, then atomically
+swaps the manifest with os.replace(), so a crash never leaves a half-written
+gallery. Segments are opened with np.load(mmap_mode="r"), which makes opening
+cost independent of gallery size. Replaced identities leave dead rows behind;
+they are dropped by compact() once they outweigh the live rows.
+
+Writers (put_many, remove, compact) hold an exclusive lock on store.lock
+across processes, so the app and core.batch_enroll can commit to the same
+store: each writer re-reads the manifest under the lock, and orphaned
+segments are only deleted while no other writer can be mid-commit.
+"""
+
+import json
+import os
+import pickle
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from core.face_index import GalleryIndex
+
+
+FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = "store.lock"
+
+
+def _atomic_write_bytes(path: str, payload: bytes):
+    tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(tmp, "wb") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _atomic_save_npy(path: str, arr: np.ndarray):
+    tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(tmp, "wb") as f:
+        np.save(f, arr, allow_pickle=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class _FileLock:
+    """Exclusive inter-process lock on a file (flock on POSIX, msvcrt on
+    Windows). Re-entrant for the holder; callers serialize threads themselves."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._depth = 0
+
+    def __enter__(self) -> "_FileLock":
+        if self._depth == 0:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            f = open(self.path, "a+b")
+            try:
+                if os.name == "nt":
+                    import msvcrt
+                    f.seek(0)
+                    while True:
+                        try:
+                            # LK_LOCK itself retries for ~10 s before raising.
+                            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                            break
+                        except OSError:
+                            continue
+                else:
+                    import fcntl
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            except Exception:
+                f.close()
+                raise
+            self._file = f
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth:
+            return
+        f, self._file = self._file, None
+        try:
+            if os.name == "nt":
+                import msvcrt
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        finally:
+            f.close()
+
+
+def _as_rows(encs: Any, dim: Optional[int]) -> np.ndarray:
+    if encs is None:
+        return np.zeros((0, dim or 0), dtype=np.float64)
+    if isinstance(encs, np.ndarray) and encs.ndim == 2:
+        return np.asarray(encs, dtype=np.float64)
+    if not isinstance(encs, (list, tuple)):
+        encs = [encs]
+    vecs = [np.asarray(e, dtype=np.float64).ravel() for e in encs if e is not None]
+    if not vecs:
+        return np.zeros((0, dim or 0), dtype=np.float64)
+    return np.vstack(vecs)
+
+
+class EncodingStore:
+    def __init__(self, root: str, legacy_pickle: Optional[str] = None):
+        self.root = root
+        self.legacy_pickle = legacy_pickle
+        self._lock = threading.RLock()
+        self._write_lock = _FileLock(os.path.join(root, LOCK_NAME))
+        self._manifest: Dict[str, Any] = {}
+        self._segments: Dict[str, np.ndarray] = {}
+        self._loaded_stamp: Optional[Tuple[float, int]] = None
+        self._legacy_checked = False
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.root, MANIFEST_NAME)
+
+    def _empty_manifest(self) -> Dict[str, Any]:
+        return {"version": FORMAT_VERSION, "generation": 0, "dim": None,
+                "segments": [], "entries": []}
+
+    def _stamp(self) -> Optional[Tuple[float, int]]:
+        try:
+            st = os.stat(self.manifest_path)
+            return (st.st_mtime, st.st_size)
+        except OSError:
+            return None
+
+    def open(self) -> "EncodingStore":
+        """Read the manifest (and migrate a legacy pickle on first use)."""
+        with self._lock:
+            stamp = self._stamp()
+            if stamp is None:
+                self._manifest = self._empty_manifest()
+                self._segments = {}
+                self._loaded_stamp = None
+                if not self._legacy_checked:
+                    self._legacy_checked = True
+                    self._migrate_legacy()
+                return self
+            if stamp == self._loaded_stamp and self._manifest:
+                return self
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if int(manifest.get("version", 0)) > FORMAT_VERSION:
+                raise RuntimeError(f"Encodings store version {manifest.get('version')} is newer than supported")
+            live = {s["file"] for s in manifest.get("segments", [])}
+            self._segments = {k: v for k, v in self._segments.items() if k in live}
+            self._manifest = manifest
+            self._loaded_stamp = stamp
+            return self
+
+    def _open_for_write(self):
+        """Re-read the manifest under the write lock; another process may
+        have committed within the same mtime tick."""
+        self._loaded_stamp = None
+        self.open()
+
+    def _migrate_legacy(self):
+        path = self.legacy_pickle
+        if not path or not os.path.exists(path):
+            return
+        try:
+            with open(path, "rb") as f:
+                data = pickle.load(f) or {}
+        except Exception as e:
+            print(f"[FaceStore] Could not read legacy encodings: {e}")
+            return
+        items = [(name, encs) for name, encs in data.items() if encs is not None]
+        if items:
+            self.put_many(items)
+            print(f"[FaceStore] Migrated {len(items)} identities from {path}.")
+
+    def _segment(self, file: str) -> np.ndarray:
+        arr = self._segments.get(file)
+        if arr is None:
+            arr = np.load(os.path.join(self.root, file), mmap_mode="r", allow_pickle=False)
+            self._segments[file] = arr
+        return arr
+
+    def names(self) -> List[str]:
+        with self._lock:
+            self.open()
+            return [e["name"] for e in self._manifest.get("entries", [])]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.names()
+
+    def get(self, name: str) -> Optional[np.ndarray]:
+        with self._lock:
+            self.open()
+            for e in self._manifest.get("entries", []):
+                if e["name"] == name:
+                    seg = self._segment(e["segment"])
+                    return seg[e["offset"]:e["offset"] + e["count"]]
+        return None
+
+    def load(self) -> Dict[str, List[Any]]:
+        """Gallery as {name: [encoding, ...]}; rows are read-only mmap views."""
+        with self._lock:
+            self.open()
+            out: Dict[str, List[Any]] = {}
+            for e in self._manifest.get("entries", []):
+                seg = self._segment(e["segment"])
+                out[e["name"]] = list(seg[e["offset"]:e["offset"] + e["count"]])
+            return out
+
+    def index(self) -> GalleryIndex:
+        """Build a GalleryIndex straight from the mapped segments."""
+        with self._lock:
+            self.open()
+            entries = self._manifest.get("entries", [])
+            dim = self._manifest.get("dim") or 128
+            if not entries:
+                return GalleryIndex(np.zeros((0, dim)), [], [])
+            names = [e["name"] for e in entries]
+            labels = np.repeat(np.arange(len(entries)), [e["count"] for e in entries])
+            first = entries[0]
+            seg = self._segment(first["segment"])
+            contiguous = all(e["segment"] == first["segment"] for e in entries)
+            if contiguous:
+                offset = first["offset"]
+                for e in entries:
+                    if e["offset"] != offset:
+                        contiguous = False
+                        break
+                    offset += e["count"]
+            if contiguous:
+                # Zero-copy view over a compacted segment.
+                matrix = seg[first["offset"]:first["offset"] + len(labels)]
+            else:
+                matrix = np.concatenate([
+                    self._segment(e["segment"])[e["offset"]:e["offset"] + e["count"]]
+                    for e in entries
+                ])
+            return GalleryIndex(matrix, labels, names)
+
+    def put(self, name: str, encodings: Any):
+        self.put_many([(name, encodings)])
+
+    def put_many(self, items: Iterable[Tuple[str, Any]]):
+        """Add or replace identities in one transaction (one segment, one manifest swap)."""
+        with self._lock, self._write_lock:
+            self._open_for_write()
+            manifest = json.loads(json.dumps(self._manifest))
+            dim = manifest.get("dim")
+            blocks: List[np.ndarray] = []
+            new_entries: List[Dict[str, Any]] = []
+            offset = 0
+            gen = int(manifest.get("generation", 0)) + 1
+            seg_file = f"seg-{gen:06d}.npy"
+            for name, encs in items:
+                rows = _as_rows(encs, dim)
+                if not len(rows):
+                    continue
+                if dim is None:
+                    dim = int(rows.shape[1])
+                elif rows.shape[1] != dim:
+                    raise ValueError(f"Encoding size {rows.shape[1]} for {name!r} does not match store ({dim})")
+                new_entries = [e for e in new_entries if e["name"] != name]
+                new_entries.append({"name": name, "segment": seg_file, "offset": offset, "count": int(len(rows))})
+                blocks.append(rows)
+                offset += len(rows)
+            if not new_entries:
+                return
+
+            os.makedirs(self.root, exist_ok=True)
+            data = np.ascontiguousarray(np.vstack(blocks), dtype=np.float64)
+            _atomic_save_npy(os.path.join(self.root, seg_file), data)
+
+            replaced = {e["name"] for e in new_entries}
+            manifest["entries"] = [e for e in manifest.get("entries", []) if e["name"] not in replaced] + new_entries
+            manifest["segments"] = manifest.get("segments", []) + [{"file": seg_file, "rows": int(len(data))}]
+            manifest["generation"] = gen
+            manifest["dim"] = dim
+            manifest["version"] = FORMAT_VERSION
+            self._commit(manifest)
+
+            if self._dead_rows() > max(64, self._live_rows()):
+                self.compact()
+
+    def remove(self, name: str) -> bool:
+        with self._lock, self._write_lock:
+            self._open_for_write()
+            manifest = json.loads(json.dumps(self._manifest))
+            entries = manifest.get("entries", [])
+            kept = [e for e in entries if e["name"] != name]
+            if len(kept) == len(entries):
+                return False
+            manifest["entries"] = kept
+            manifest["generation"] = int(manifest.get("generation", 0)) + 1
+            self._commit(manifest)
+            return True
+
+    def _live_rows(self) -> int:
+        return sum(e["count"] for e in self._manifest.get("entries", []))
+
+    def _dead_rows(self) -> int:
+        return sum(s["rows"] for s in self._manifest.get("segments", [])) - self._live_rows()
+
+    def _commit(self, manifest: Dict[str, Any]):
+        used = {e["segment"] for e in manifest.get("entries", [])}
+        manifest["segments"] = [s for s in manifest.get("segments", []) if s["file"] in used]
+        payload = json.dumps(manifest, ensure_ascii=False, indent=1).encode("utf-8")
+        _atomic_write_bytes(self.manifest_path, payload)
+        self._manifest = manifest
+        self._loaded_stamp = self._stamp()
+        self._segments = {k: v for k, v in self._segments.items() if k in used}
+        self._remove_orphans(used)
+
+    def _remove_orphans(self, used):
+        try:
+            for fn in os.listdir(self.root):
+                if fn.startswith("seg-") and fn.endswith(".npy") and fn not in used:
+                    try:
+                        os.remove(os.path.join(self.root, fn))
+                    except OSError:
+                        # Still mapped somewhere (Windows); retried on the next commit.
+                        pass
+        except OSError:
+            pass
+
+    def compact(self):
+        """Rewrite all live rows into one contiguous segment."""
+        with self._lock, self._write_lock:
+            self._open_for_write()
+            entries = self._manifest.get("entries", [])
+            if not entries:
+                return
+            self.put_many([(e["name"], self.get(e["name"])) for e in entries])
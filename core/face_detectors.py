@@ -0,0 +1,202 @@
+"""
+Pluggable face-detector backends.
+
+Backends:
+  hog    -> dlib HOG via face_recognition (the original detector)
+  yunet  -> OpenCV DNN YuNet (cv2.FaceDetectorYN, needs the .onnx model)
+  haar   -> OpenCV Haar cascade (fastest, least accurate)
+
+Every backend takes RGB images and returns (top, right, bottom, left) boxes in
+the coordinates of the image it was given. Before detection the image is
+shrunk so its longer side is at most `max_side`, then tried at each factor in
+`scales` (coarse first) until a face is found. detect() is thread-safe: the
+process-wide detector is shared by the main loop and the emotion monitor,
+and the OpenCV backends keep per-call state, so calls are serialized.
+
+Environment:
+  TRAVIS_FACE_DETECTOR          -> hog | yunet | haar (default hog)
+  TRAVIS_FACE_DETECT_SCALES     -> comma-separated factors, e.g. "0.5,1.0" (default 1.0)
+  TRAVIS_FACE_DETECT_MAX_SIDE   -> longest side before scaling (default 720)
+  TRAVIS_YUNET_MODEL            -> path to face_detection_yunet_*.onnx
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple, Type
+
+import cv2
+
+Box = Tuple[int, int, int, int]
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+DEFAULT_YUNET_MODEL = os.path.join(BASE_DIR, "models", "face_detection_yunet_2023mar.onnx")
+
+
+def parse_scales(raw: Optional[str]) -> List[float]:
+    scales = []
+    for part in (raw or "").split(","):
+        try:
+            v = float(part.strip())
+        except ValueError:
+            continue
+        if 0.0 < v <= 4.0:
+            scales.append(v)
+    return scales or [1.0]
+
+
+def box_area(box: Box) -> int:
+    top, right, bottom, left = box
+    return max(0, bottom - top) * max(0, right - left)
+
+
+def crop_face(frame, box: Box, margin: float = 0.15):
+    """Crop a (top, right, bottom, left) box with a small margin, clamped to the frame."""
+    top, right, bottom, left = box
+    h, w = frame.shape[:2]
+    mh = int((bottom - top) * margin)
+    mw = int((right - left) * margin)
+    t, b = max(0, top - mh), min(h, bottom + mh)
+    l, r = max(0, left - mw), min(w, right + mw)
+    if b <= t or r <= l:
+        return None
+    return frame[t:b, l:r]
+
+
+class FaceDetector:
+    name = "base"
+
+    def __init__(self, scales: Optional[Sequence[float]] = None, max_side: Optional[int] = 720):
+        self.scales = list(scales) if scales else [1.0]
+        self.max_side = max_side
+        self._lock = threading.Lock()
+
+    def _detect(self, rgb) -> List[Box]:
+        raise NotImplementedError
+
+    def detect(self, rgb) -> List[Box]:
+        h, w = rgb.shape[:2]
+        base = 1.0
+        if self.max_side and max(h, w) > self.max_side:
+            base = self.max_side / float(max(h, w))
+        for s in self.scales:
+            f = base * s
+            if abs(f - 1.0) < 1e-3:
+                img, f = rgb, 1.0
+            else:
+                img = cv2.resize(rgb, (max(1, int(w * f)), max(1, int(h * f))),
+                                 interpolation=cv2.INTER_AREA if f < 1.0 else cv2.INTER_LINEAR)
+            with self._lock:
+                boxes = self._detect(img)
+            if boxes:
+                if f == 1.0:
+                    return [tuple(int(v) for v in b) for b in boxes]
+                inv = 1.0 / f
+                return [
+                    (max(0, int(t * inv)), min(w, int(r * inv)), min(h, int(b * inv)), max(0, int(l * inv)))
+                    for t, r, b, l in boxes
+                ]
+        return []
+
+    __call__ = detect
+
+
+class HogDetector(FaceDetector):
+    name = "hog"
+
+    def __init__(self, upsample: int = 1, **kwargs):
+        super().__init__(**kwargs)
+        self.upsample = upsample
+
+    def _detect(self, rgb) -> List[Box]:
+        import face_recognition
+        return face_recognition.face_locations(rgb, number_of_times_to_upsample=self.upsample, model="hog")
+
+
+class YuNetDetector(FaceDetector):
+    name = "yunet"
+
+    def __init__(self, model_path: Optional[str] = None, score_threshold: float = 0.8,
+                 nms_threshold: float = 0.3, top_k: int = 50, **kwargs):
+        super().__init__(**kwargs)
+        self.model_path = model_path or os.environ.get("TRAVIS_YUNET_MODEL") or DEFAULT_YUNET_MODEL
+        if not hasattr(cv2, "FaceDetectorYN"):
+            raise RuntimeError("OpenCV build has no FaceDetectorYN (needs opencv >= 4.5.4)")
+        if not os.path.isfile(self.model_path):
+            raise RuntimeError(f"YuNet model not found: {self.model_path}")
+        self._net = cv2.FaceDetectorYN.create(self.model_path, "", (320, 320),
+                                              score_threshold, nms_threshold, top_k)
+        self._size = (320, 320)
+
+    def _detect(self, rgb) -> List[Box]:
+        h, w = rgb.shape[:2]
+        if self._size != (w, h):
+            self._net.setInputSize((w, h))
+            self._size = (w, h)
+        _, faces = self._net.detect(cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR))
+        if faces is None:
+            return []
+        boxes = []
+        for row in faces:
+            x, y, fw, fh = (int(v) for v in row[:4])
+            boxes.append((max(0, y), min(w, x + fw), min(h, y + fh), max(0, x)))
+        return boxes
+
+
+class HaarDetector(FaceDetector):
+    name = "haar"
+
+    def __init__(self, cascade_path: Optional[str] = None, scale_factor: float = 1.1,
+                 min_neighbors: int = 5, min_size: int = 40, **kwargs):
+        super().__init__(**kwargs)
+        path = cascade_path or os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml")
+        self._cascade = cv2.CascadeClassifier(path)
+        if self._cascade.empty():
+            raise RuntimeError(f"Could not load Haar cascade: {path}")
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+
+    def _detect(self, rgb) -> List[Box]:
+        gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+        found = self._cascade.detectMultiScale(gray, scaleFactor=self.scale_factor,
+                                               minNeighbors=self.min_neighbors,
+                                               minSize=(self.min_size, self.min_size))
+        return [(int(y), int(x + fw), int(y + fh), int(x)) for (x, y, fw, fh) in found]
+
+
+DETECTORS: Dict[str, Type[FaceDetector]] = {
+    "hog": HogDetector,
+    "yunet": YuNetDetector,
+    "haar": HaarDetector,
+}
+
+
+def create_detector(name: Optional[str] = None, scales: Optional[Sequence[float]] = None,
+                    max_side: Optional[int] = None, **kwargs) -> FaceDetector:
+    name = (name or os.environ.get("TRAVIS_FACE_DETECTOR", "hog") or "hog").strip().lower()
+    if scales is None:
+        scales = parse_scales(os.environ.get("TRAVIS_FACE_DETECT_SCALES"))
+    if max_side is None:
+        max_side = int(os.environ.get("TRAVIS_FACE_DETECT_MAX_SIDE", "720")) or None
+    cls = DETECTORS.get(name)
+    if cls is None:
+        raise ValueError(f"Unknown face detector {name!r}; choose from {', '.join(DETECTORS)}")
+    return cls(scales=scales, max_side=max_side, **kwargs)
+
+
+_default: Optional[FaceDetector] = None
+_default_lock = threading.Lock()
+
+
+def get_detector() -> FaceDetector:
+    """Detector selected by config; falls back to HOG if the choice can't load."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            try:
+                _default = create_detector()
+            except Exception as e:
+                print(f"[FaceDetect] {e}; falling back to HOG.")
+                _default = create_detector("hog")
+            print(f"[FaceDetect] Using {_default.name} detector.")
+        return _default
@@ -0,0 +1,110 @@
+"""
+Vectorized gallery index for face matching.
+
+All stored encodings are kept in one contiguous float matrix with a parallel
+label array (row -> identity). A probe, or every probe found in one frame,
+is matched against the whole gallery with a single matrix operation instead
+of a Python loop over enrolled names.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class GalleryIndex:
+    def __init__(self, matrix, labels, names: Sequence[str]):
+        matrix = np.asarray(matrix, dtype=np.float64)
+        labels = np.asarray(labels, dtype=np.int64)
+        if matrix.ndim != 2:
+            matrix = matrix.reshape(len(labels), -1)
+
+        # Keep rows grouped by identity so per-name minima are one reduceat.
+        if len(labels) and np.any(np.diff(labels) < 0):
+            order = np.argsort(labels, kind="stable")
+            matrix = matrix[order]
+            labels = labels[order]
+
+        self.matrix = np.ascontiguousarray(matrix)
+        self.labels = labels
+        self.names: List[str] = list(names)
+        self._sq_norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+        if len(labels):
+            self._starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+            self._row_names = labels[self._starts]
+        else:
+            self._starts = np.zeros(0, dtype=np.int64)
+            self._row_names = np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], dim: int = 128) -> "GalleryIndex":
+        rows: List[np.ndarray] = []
+        labels: List[int] = []
+        names: List[str] = []
+        for name, encs in (data or {}).items():
+            if encs is None:
+                continue
+            encs = encs if isinstance(encs, list) else [encs]
+            vecs = [np.asarray(e, dtype=np.float64).ravel() for e in encs if e is not None]
+            if not vecs:
+                continue
+            names.append(name)
+            labels.extend([len(names) - 1] * len(vecs))
+            rows.extend(vecs)
+        if not rows:
+            return cls(np.zeros((0, dim)), [], [])
+        return cls(np.vstack(rows), labels, names)
+
+    def __len__(self) -> int:
+        return len(self._row_names)
+
+    @property
+    def size(self) -> int:
+        return int(self.matrix.shape[0])
+
+    def distances(self, probes) -> np.ndarray:
+        """Euclidean distance of every probe to every stored row, shape (P, N)."""
+        p = np.atleast_2d(np.asarray(probes, dtype=np.float64))
+        d2 = np.einsum("ij,ij->i", p, p)[:, None] + self._sq_norms[None, :]
+        d2 -= 2.0 * (p @ self.matrix.T)
+        np.maximum(d2, 0.0, out=d2)
+        return np.sqrt(d2, out=d2)
+
+    def identity_distances(self, probes) -> np.ndarray:
+        """Closest-sample distance of every probe to every identity, shape (P, I)."""
+        d = self.distances(probes)
+        if not self.size:
+            return np.zeros((d.shape[0], 0))
+        return np.minimum.reduceat(d, self._starts, axis=1)
+
+    def match(self, probes, k: int = 1) -> List[List[Tuple[str, float]]]:
+        """Top-k (name, distance) pairs for each probe, closest first."""
+        p = np.atleast_2d(np.asarray(probes, dtype=np.float64))
+        if not len(self) or not p.size:
+            return [[] for _ in range(p.shape[0] if p.ndim == 2 else 0)]
+        per_name = self.identity_distances(p)
+        k = max(1, min(int(k), per_name.shape[1]))
+        if k < per_name.shape[1]:
+            top = np.argpartition(per_name, k - 1, axis=1)[:, :k]
+        else:
+            top = np.tile(np.arange(per_name.shape[1]), (per_name.shape[0], 1))
+        rows = np.arange(per_name.shape[0])[:, None]
+        order = np.argsort(per_name[rows, top], axis=1)
+        top = top[rows, order]
+        out: List[List[Tuple[str, float]]] = []
+        for i in range(per_name.shape[0]):
+            out.append([
+                (self.names[self._row_names[j]], float(per_name[i, j]))
+                for j in top[i]
+            ])
+        return out
+
+    def best(self, probes, tolerance: float = 0.6) -> Tuple[Optional[str], float]:
+        """Closest identity over all probes, or (None, dist) if above tolerance."""
+        best_name, best_dist = None, 1.0
+        for hits in self.match(probes, k=1):
+            if hits and hits[0][1] < best_dist:
+                best_name, best_dist = hits[0]
+        if best_name is not None and best_dist <= tolerance:
+            return best_name, best_dist
+        return None, best_dist
@@ -2,41 +2,96 @@
 import face_recognition
 import cv2
 import os
-import pickle
+import threading
+import time
+import numpy as np
 from typing import Dict, List, Any
 
+from core.camera import get_camera
+from core.encoding_store import EncodingStore
+from core.face_detectors import get_detector
+from core.face_tracker import FaceTracker, tracking_mode
+
 
 
 FACES_DIR = "faces"
 ENCODINGS_PATH = os.path.join(FACES_DIR, "encodings.pkl")
+GALLERY_DIR = os.path.join(FACES_DIR, "gallery")
 OWNER_NAME_PATH = os.path.join(FACES_DIR, "owner.txt")
 
-def load_encodings():
-    if not os.path.exists(ENCODINGS_PATH):
-        return {}
-    with open(ENCODINGS_PATH, "rb") as f:
-        data = pickle.load(f)
-
+# New samples closer than this to one already kept add little and are skipped.
+DIVERSITY_DISTANCE = 0.35
+
+# File stamps are re-checked at most this often, so hot paths stay in memory.
+CACHE_CHECK_SECONDS = float(os.environ.get("TRAVIS_FACE_CACHE_CHECK_S", "2.0"))
+
+# Legacy encodings.pkl is imported into the store the first time it is opened.
+_store = EncodingStore(GALLERY_DIR, legacy_pickle=ENCODINGS_PATH)
+
+
+class _FileCache:
+    """Parsed file contents kept in memory; reloaded only when mtime/size change."""
+
+    def __init__(self, path: str, loader, interval: float = CACHE_CHECK_SECONDS):
+        self.path = path
+        self.loader = loader
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._value = None
+        self._stamp = None
+        self._checked = None
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def get(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._checked is not None and now - self._checked < self.interval:
+                return self._value
+            stamp = self._stat()
+            if self._checked is None or stamp != self._stamp:
+                self._value = self.loader()
+                self._stamp = self._stat()
+            self._checked = now
+            return self._value
+
+    def set(self, value):
+        """Install a value we just wrote ourselves, without re-reading the file."""
+        with self._lock:
+            self._value = value
+            self._stamp = self._stat()
+            self._checked = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._checked = None
+
+
+class _Gallery:
+    def __init__(self, data: Dict[str, List[Any]]):
+        self.data = data
+        self._index = None
+
+    def index(self):
+        if self._index is None:
+            self._index = _store.index()
+        return self._index
+
+
+def _load_gallery() -> _Gallery:
     try:
-        norm: Dict[str, List[Any]] = {}
-        for name, enc in (data or {}).items():
-            if enc is None:
-                continue
-            if isinstance(enc, list):
-                norm[name] = enc
-            else:
-                norm[name] = [enc]
-        return norm
-    except Exception:
-        return data
-
-def save_encodings(data):
-    os.makedirs(FACES_DIR, exist_ok=True)
-    with open(ENCODINGS_PATH, "wb") as f:
-        pickle.dump(data, f)
+        return _Gallery(_store.load())
+    except Exception as e:
+        print(f"[FaceStore] Failed to open encodings store: {e}")
+        return _Gallery({})
 
 
-def get_owner_name():
+def _load_owner():
     try:
         if os.path.exists(OWNER_NAME_PATH):
             with open(OWNER_NAME_PATH, "r", encoding="utf-8") as f:
@@ -47,108 +102,151 @@ def get_owner_name():
     return None
 
 
+_gallery_cache = _FileCache(_store.manifest_path, _load_gallery)
+_owner_cache = _FileCache(OWNER_NAME_PATH, _load_owner)
+
+
+def get_store() -> EncodingStore:
+    return _store
+
+
+def load_encodings():
+    return dict(_gallery_cache.get().data)
+
+
+def gallery_index():
+    return _gallery_cache.get().index()
+
+
+def add_encodings(name: str, samples: List[Any]):
+    """Append (or replace) one identity without rewriting the other vectors."""
+    add_many_encodings([(name, samples)])
+
+
+def add_many_encodings(items):
+    """Append (or replace) several identities in one store transaction."""
+    items = [(name, samples) for name, samples in items if samples]
+    if not items:
+        return
+    _store.put_many(items)
+    gallery = _gallery_cache.get()
+    for name, _ in items:
+        gallery.data[name] = list(_store.get(name))
+    gallery._index = None
+    _gallery_cache.set(gallery)
+
+
+def add_if_diverse(samples: List[Any], enc, min_distance: float = DIVERSITY_DISTANCE) -> bool:
+    """Keep `enc` only if it differs enough from every sample already kept."""
+    if len(samples) == 0:
+        samples.append(enc)
+        return True
+    dists = face_recognition.face_distance(samples, enc)
+    if float(min(dists)) > min_distance:
+        samples.append(enc)
+        return True
+    return False
+
+
+def save_encodings(data):
+    current = _store.names()
+    changed = []
+    for name, encs in (data or {}).items():
+        if encs is None:
+            continue
+        encs = encs if isinstance(encs, list) else [encs]
+        stored = _store.get(name)
+        if stored is not None and len(stored) == len(encs) and np.array_equal(stored, np.asarray(encs, dtype=np.float64)):
+            continue
+        changed.append((name, encs))
+    if changed:
+        _store.put_many(changed)
+    for name in current:
+        if name not in (data or {}):
+            _store.remove(name)
+    _gallery_cache.invalidate()
+
+
+def get_owner_name():
+    return _owner_cache.get()
+
+
 def set_owner_name(name: str):
     os.makedirs(FACES_DIR, exist_ok=True)
+    name = (name or "Owner").strip()
     with open(OWNER_NAME_PATH, "w", encoding="utf-8") as f:
-        f.write((name or "Owner").strip())
+        f.write(name)
+    _owner_cache.set(name or None)
 
-def recognize(max_tries: int = 6, tolerance: float = 0.58):
-    data = load_encodings()
-    if not data:
+def new_tracker():
+    """FaceTracker over the configured detector, or None when tracking is off."""
+    if tracking_mode() == "off":
+        return None
+    return FaceTracker(get_detector())
+
+
+def analyze_frame(frame, tracker=None):
+    """Detect and encode faces once.
+
+    Returns (boxes, encodings); boxes are (top, right, bottom, left) in the
+    pixel coordinates of the original frame. The detector backend handles its
+    own downscaling. With a tracker, known faces are followed from the
+    previous frame instead of re-running full detection.
+    """
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    if tracker is not None:
+        boxes = tracker.update(rgb)
+    else:
+        boxes = get_detector().detect(rgb)
+    if not boxes:
+        return [], []
+    encodings = face_recognition.face_encodings(rgb, boxes)
+    return boxes, encodings
+
+
+def recognize(max_tries: int = 6, tolerance: float = 0.58, index=None):
+    if index is None:
+        try:
+            index = gallery_index()
+        except Exception as e:
+            print(f"[FaceStore] Failed to open encodings store: {e}")
+            return None
+    if not len(index):
         print("[FaceStore] No stored faces.")
         return None
 
-    cam = cv2.VideoCapture(0)
-    try:
-        for _ in range(max_tries):
-            ret, frame = cam.read()
-            if not ret:
-                continue
-
-
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            try:
-                h, w = rgb.shape[:2]
-                scale = 0.5 if max(h, w) > 720 else 1.0
-                if scale < 1.0:
-                    rgb_small = cv2.resize(rgb, (int(w * scale), int(h * scale)))
-                else:
-                    rgb_small = rgb
-            except Exception:
-                rgb_small = rgb
-            face_locations = face_recognition.face_locations(rgb_small, model="hog")
-            encodings = face_recognition.face_encodings(rgb_small, face_locations)
-
-            for encoding in encodings:
-
-                best_name = None
-                best_dist = 1.0
-                for name, stored_list in data.items():
-                    encs = stored_list if isinstance(stored_list, list) else [stored_list]
-                    try:
-                        dists = face_recognition.face_distance(encs, encoding)
-                        dist = float(min(dists)) if len(dists) else 1.0
-                        if dist < best_dist:
-                            best_dist = dist
-                            best_name = name
-                    except Exception:
-                        continue
-                if best_name is not None and best_dist <= tolerance:
-                    print(f"[FaceStore] Recognized: {best_name} (dist={best_dist:.2f})")
-                    return best_name
-    finally:
-        cam.release()
+    tracker = new_tracker()
+    for _, frame in get_camera().frames(max_tries):
+        _, encodings = analyze_frame(frame, tracker)
+        if not encodings:
+            continue
+
+        best_name, best_dist = index.best(encodings, tolerance=tolerance)
+        if best_name is not None:
+            print(f"[FaceStore] Recognized: {best_name} (dist={best_dist:.2f})")
+            return best_name
 
     print("[FaceStore] Face not recognized.")
     return None
 
 def capture_and_add(name="owner", attempts: int = 15, max_samples: int = 5):
-    cam = cv2.VideoCapture(0)
-    try:
-        samples: List[Any] = []
-        for _ in range(attempts):
-            ret, frame = cam.read()
-            if not ret:
-                continue
-
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            try:
-                h, w = rgb.shape[:2]
-                scale = 0.5 if max(h, w) > 720 else 1.0
-                if scale < 1.0:
-                    rgb_small = cv2.resize(rgb, (int(w * scale), int(h * scale)))
-                else:
-                    rgb_small = rgb
-            except Exception:
-                rgb_small = rgb
-
-            face_locations = face_recognition.face_locations(rgb_small, model="hog")
-            if not face_locations:
-                continue
-            encodings = face_recognition.face_encodings(rgb_small, face_locations)
-            if not encodings:
-                continue
-
-            for enc in encodings:
-                if len(samples) == 0:
-                    samples.append(enc)
-                else:
-                    import numpy as np
-                    dists = face_recognition.face_distance(samples, enc)
-                    if float(min(dists)) > 0.35:
-                        samples.append(enc)
-                if len(samples) >= max_samples:
-                    break
+    samples: List[Any] = []
+    tracker = new_tracker()
+    for _, frame in get_camera().frames(attempts):
+        _, encodings = analyze_frame(frame, tracker)
+        if not encodings:
+            continue
+
+        for enc in encodings:
+            add_if_diverse(samples, enc)
             if len(samples) >= max_samples:
                 break
-        if samples:
-            data = load_encodings()
-            data[name] = samples
-            save_encodings(data)
-            print(f"[FaceStore] Added face for: {name} with {len(samples)} samples.")
-            return True
-    finally:
-        cam.release()
+        if len(samples) >= max_samples:
+            break
+    if samples:
+        add_encodings(name, samples)
+        print(f"[FaceStore] Added face for: {name} with {len(samples)} samples.")
+        return True
     print("[FaceStore] Failed to capture/encode face.")
     return False
 
@@ -160,8 +258,7 @@ def ensure_owner_enrolled(speak=print):
     - Captures a single frame from the default camera and stores encoding.
     """
     owner_name = get_owner_name()
-    enc = load_encodings()
-    if owner_name and owner_name in enc:
+    if owner_name and owner_name in _gallery_cache.get().data:
         return owner_name
 
 
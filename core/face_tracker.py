@@ -0,0 +1,145 @@
+"""
+Face tracking between frames to skip redundant full-frame detection.
+
+After a full detection, each face box is followed through the next frames
+either by re-running the detector only inside an enlarged region around the
+previous box ("roi"), or with a cheap OpenCV correlation tracker ("kcf").
+Confidence decays with every tracked frame and drops to zero when a track is
+lost; full detection reruns as soon as any track falls below the threshold,
+which also picks up people who walked into view in the meantime.
+
+Environment:
+  TRAVIS_FACE_TRACKING        -> off | roi | kcf (default roi)
+  TRAVIS_FACE_TRACK_DECAY     -> confidence multiplier per tracked frame (default 0.9)
+  TRAVIS_FACE_TRACK_MIN_CONF  -> rerun full detection below this (default 0.5)
+"""
+
+import os
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+Box = Tuple[int, int, int, int]  # (top, right, bottom, left), face_recognition order
+
+
+def tracking_mode() -> str:
+    mode = (os.environ.get("TRAVIS_FACE_TRACKING", "roi") or "roi").strip().lower()
+    return mode if mode in ("off", "roi", "kcf") else "roi"
+
+
+def box_iou(a: Box, b: Box) -> float:
+    t = max(a[0], b[0])
+    r = min(a[1], b[1])
+    bt = min(a[2], b[2])
+    l = max(a[3], b[3])
+    inter = max(0, r - l) * max(0, bt - t)
+    area_a = (a[1] - a[3]) * (a[2] - a[0])
+    area_b = (b[1] - b[3]) * (b[2] - b[0])
+    union = area_a + area_b - inter
+    return inter / union if union > 0 else 0.0
+
+
+def _expand(box: Box, margin: float, shape) -> Box:
+    top, right, bottom, left = box
+    h, w = shape[:2]
+    mh = int((bottom - top) * margin)
+    mw = int((right - left) * margin)
+    return (max(0, top - mh), min(w, right + mw), min(h, bottom + mh), max(0, left - mw))
+
+
+def _create_kcf():
+    for factory in (
+        getattr(cv2, "TrackerKCF_create", None),
+        getattr(getattr(cv2, "legacy", None), "TrackerKCF_create", None),
+    ):
+        if factory is not None:
+            try:
+                return factory()
+            except Exception:
+                continue
+    return None
+
+
+class _Track:
+    def __init__(self, box: Box, confidence: float = 1.0):
+        self.box = box
+        self.confidence = confidence
+        self.cv_tracker = None
+
+
+class FaceTracker:
+    def __init__(self, detect: Callable[[object], List[Box]], mode: Optional[str] = None,
+                 roi_margin: float = 0.6, decay: Optional[float] = None,
+                 min_confidence: Optional[float] = None):
+        """`detect(rgb)` is the full detector; it must also work on an RGB sub-image."""
+        self.detect = detect
+        self.mode = mode or tracking_mode()
+        if self.mode == "kcf" and _create_kcf() is None:
+            print("[FaceTracker] OpenCV KCF tracker not available; using ROI search.")
+            self.mode = "roi"
+        self.roi_margin = roi_margin
+        self.decay = decay if decay is not None else float(os.environ.get("TRAVIS_FACE_TRACK_DECAY", "0.9"))
+        self.min_confidence = (min_confidence if min_confidence is not None
+                               else float(os.environ.get("TRAVIS_FACE_TRACK_MIN_CONF", "0.5")))
+        self.tracks: List[_Track] = []
+        self.full_detections = 0
+        self.tracked_frames = 0
+
+    def reset(self):
+        self.tracks = []
+
+    def update(self, rgb) -> List[Box]:
+        """Face boxes for this frame (same coordinate space as `rgb`)."""
+        if self.mode == "off" or not self.tracks:
+            return self._full(rgb)
+
+        for tr in self.tracks:
+            box = self._follow(tr, rgb)
+            if box is None:
+                tr.confidence = 0.0
+            else:
+                tr.box = box
+                tr.confidence *= self.decay
+        if any(tr.confidence < self.min_confidence for tr in self.tracks):
+            return self._full(rgb)
+        self.tracked_frames += 1
+        return [tr.box for tr in self.tracks]
+
+    def _full(self, rgb) -> List[Box]:
+        boxes = list(self.detect(rgb) or [])
+        self.full_detections += 1
+        self.tracks = []
+        if self.mode == "off":
+            return boxes
+        for box in boxes:
+            tr = _Track(tuple(int(v) for v in box))
+            if self.mode == "kcf":
+                tr.cv_tracker = _create_kcf()
+                top, right, bottom, left = tr.box
+                try:
+                    tr.cv_tracker.init(rgb, (left, top, right - left, bottom - top))
+                except Exception:
+                    tr.cv_tracker = None
+            self.tracks.append(tr)
+        return boxes
+
+    def _follow(self, tr: _Track, rgb) -> Optional[Box]:
+        if self.mode == "kcf" and tr.cv_tracker is not None:
+            try:
+                ok, (x, y, w, h) = tr.cv_tracker.update(rgb)
+            except Exception:
+                return None
+            if not ok or w <= 0 or h <= 0:
+                return None
+            return (int(y), int(x + w), int(y + h), int(x))
+
+        t, r, b, l = _expand(tr.box, self.roi_margin, rgb.shape)
+        if b <= t or r <= l:
+            return None
+        found: Sequence[Box] = self.detect(np.ascontiguousarray(rgb[t:b, l:r])) or []
+        if not found:
+            return None
+        shifted = [(ft + t, fr + l, fb + t, fl + l) for ft, fr, fb, fl in found]
+        best = max(shifted, key=lambda bx: box_iou(bx, tr.box))
+        return best if box_iou(best, tr.box) > 0.0 else None
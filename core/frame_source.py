@@ -0,0 +1,214 @@
+"""
+Frame sources: live camera, video file, image folder or synthetic frames.
+
+All sources return BGR frames through a cv2.VideoCapture-style read(), so
+vision code can be profiled and regression-tested without a webcam.
+
+Source specs (also accepted in TRAVIS_FRAME_SOURCE):
+  camera:0                     -> live camera index 0 (default)
+  video:clips/door.mp4         -> replay a recorded video
+  images:clips/door_frames     -> replay a folder of images in name order
+  synthetic:640x480            -> generated frames (optionally ?face=img.jpg&count=100)
+A bare number is a camera index; an existing folder or file path is replayed.
+"""
+
+import os
+import time
+import urllib.parse
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class FrameSource:
+    live = False
+    name = "source"
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+    def isOpened(self) -> bool:
+        return True
+
+    @property
+    def fps(self) -> float:
+        return 0.0
+
+
+class CameraSource(FrameSource):
+    live = True
+    name = "camera"
+
+    def __init__(self, index: int = 0, width: Optional[int] = None, height: Optional[int] = None):
+        self.index = index
+        self._cap = cv2.VideoCapture(index)
+        try:
+            if width:
+                self._cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            if height:
+                self._cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            # Keep the driver queue short so "latest" really is the latest frame.
+            self._cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        except Exception:
+            pass
+
+    def isOpened(self) -> bool:
+        return bool(self._cap.isOpened())
+
+    def read(self):
+        return self._cap.read()
+
+    def release(self):
+        self._cap.release()
+
+    @property
+    def fps(self) -> float:
+        return float(self._cap.get(cv2.CAP_PROP_FPS) or 0.0)
+
+
+class VideoFileSource(FrameSource):
+    name = "video"
+
+    def __init__(self, path: str, loop: bool = False, realtime: bool = False):
+        self.path = path
+        self.loop = loop
+        self.realtime = realtime
+        self._cap = cv2.VideoCapture(path)
+        self._next_at = None
+
+    def isOpened(self) -> bool:
+        return bool(self._cap.isOpened())
+
+    @property
+    def fps(self) -> float:
+        return float(self._cap.get(cv2.CAP_PROP_FPS) or 0.0)
+
+    def read(self):
+        ok, frame = self._cap.read()
+        if not ok and self.loop:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self._cap.read()
+        if ok and self.realtime and self.fps > 0:
+            now = time.monotonic()
+            if self._next_at is not None and now < self._next_at:
+                time.sleep(self._next_at - now)
+            self._next_at = max(now, self._next_at or now) + 1.0 / self.fps
+        return ok, frame
+
+    def release(self):
+        self._cap.release()
+
+
+class ImageDirSource(FrameSource):
+    name = "images"
+
+    def __init__(self, folder: str, loop: bool = False):
+        self.folder = folder
+        self.loop = loop
+        self.files: List[str] = sorted(
+            os.path.join(folder, fn) for fn in os.listdir(folder) if fn.lower().endswith(IMAGE_EXTS)
+        )
+        self._pos = 0
+
+    def isOpened(self) -> bool:
+        return bool(self.files)
+
+    def read(self):
+        while self.files:
+            if self._pos >= len(self.files):
+                if not self.loop:
+                    return False, None
+                self._pos = 0
+            path = self.files[self._pos]
+            self._pos += 1
+            frame = cv2.imread(path)
+            if frame is not None:
+                return True, frame
+        return False, None
+
+
+class SyntheticSource(FrameSource):
+    """Deterministic generated frames: a noisy background and, optionally, a
+    face image drifting across it."""
+
+    name = "synthetic"
+
+    def __init__(self, width: int = 640, height: int = 480, count: Optional[int] = None,
+                 face_image: Optional[str] = None, seed: int = 0):
+        self.width = width
+        self.height = height
+        self.count = count
+        self._rng = np.random.default_rng(seed)
+        self._background = self._rng.integers(0, 60, size=(height, width, 3), dtype=np.uint8)
+        self._face = None
+        if face_image:
+            face = cv2.imread(face_image)
+            if face is not None:
+                side = min(height, width) // 2
+                fh, fw = face.shape[:2]
+                f = side / float(max(fh, fw))
+                self._face = cv2.resize(face, (max(1, int(fw * f)), max(1, int(fh * f))))
+        self._n = 0
+
+    def read(self):
+        if self.count is not None and self._n >= self.count:
+            return False, None
+        frame = self._background.copy()
+        if self._face is not None:
+            fh, fw = self._face.shape[:2]
+            span = max(1, self.width - fw)
+            x = int((self._n * 4) % (2 * span))
+            x = x if x < span else 2 * span - x
+            y = (self.height - fh) // 2
+            frame[y:y + fh, x:x + fw] = self._face
+        self._n += 1
+        return True, frame
+
+
+def is_live_spec(spec: Optional[str]) -> bool:
+    kind, _ = _split_spec(spec)
+    return kind == "camera"
+
+
+def _split_spec(spec: Optional[str]) -> Tuple[str, str]:
+    spec = (spec if spec is not None else os.environ.get("TRAVIS_FRAME_SOURCE", "")).strip()
+    if not spec:
+        return "camera", os.environ.get("TRAVIS_CAMERA_INDEX", "0")
+    if ":" in spec and spec.split(":", 1)[0] in ("camera", "video", "images", "synthetic"):
+        kind, arg = spec.split(":", 1)
+        return kind, arg
+    if spec.isdigit():
+        return "camera", spec
+    if os.path.isdir(spec):
+        return "images", spec
+    return "video", spec
+
+
+def open_frame_source(spec: Optional[str] = None, width: Optional[int] = None,
+                      height: Optional[int] = None) -> FrameSource:
+    """Open a source from a spec string (see module docstring)."""
+    kind, arg = _split_spec(spec)
+    arg, _, query = arg.partition("?")
+    opts = dict(urllib.parse.parse_qsl(query))
+    loop = opts.get("loop", "0") in ("1", "true", "yes")
+    if kind == "camera":
+        return CameraSource(int(arg or 0), width=width, height=height)
+    if kind == "video":
+        return VideoFileSource(arg, loop=loop, realtime=opts.get("realtime", "0") in ("1", "true", "yes"))
+    if kind == "images":
+        return ImageDirSource(arg, loop=loop)
+    w, _, h = (arg or "").partition("x")
+    return SyntheticSource(
+        width=int(w or width or 640),
+        height=int(h or height or 480),
+        count=int(opts["count"]) if "count" in opts else None,
+        face_image=opts.get("face"),
+        seed=int(opts.get("seed", "0")),
+    )
@@ -1,4 +1,5 @@
 import serial
+import threading
 import time
 import os
 try:
@@ -13,6 +14,8 @@ class SerialBridge:
         self.baudrate = baudrate
         self.timeout = timeout
         self.ser = None
+        # send() is called from the main loop and from background threads.
+        self._lock = threading.Lock()
         self._connect()
 
     def _connect(self):
@@ -56,6 +59,10 @@ class SerialBridge:
         return bool(self.ser and self.ser.is_open)
 
     def send(self, message: str):
+        with self._lock:
+            self._send(message)
+
+    def _send(self, message: str):
         if not isinstance(message, str):
             message = str(message)
         if not self.is_connected():
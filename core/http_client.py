@@ -0,0 +1,184 @@
+"""
+Shared HTTP client: pooled keep-alive sessions, per-backend timeouts and
+request timing.
+
+A request issued with cancel=CancelScope() is streamed and can be aborted
+from another thread: CancelScope.set() shuts down the sockets of its open
+responses, so a blocked read fails at once instead of running into the
+read timeout. The wait for response headers is still bounded only by the
+timeouts.
+
+One requests.Session per host (scheme + host + port) keeps its connections
+alive, so repeated Ollama, Wikipedia and DuckDuckGo calls skip the TCP/TLS
+handshake. Every request is timed; timing_summary() shows where answer time
+goes.
+
+Environment:
+  TRAVIS_HTTP_<BACKEND>_CONNECT  -> connect timeout in s (BACKEND: OLLAMA, WIKI, DDG, DEFAULT)
+  TRAVIS_HTTP_<BACKEND>_READ     -> read timeout in s
+  TRAVIS_HTTP_POOL               -> max pooled connections per host (default 4)
+  TRAVIS_HTTP_TIMING             -> 1 to log every request's timing (default 0)
+"""
+
+import os
+import socket
+import threading
+import time
+import urllib.parse
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# (connect, read) seconds
+DEFAULT_TIMEOUTS: Dict[str, Tuple[float, float]] = {
+    "ollama": (3.0, 20.0),
+    "wiki": (3.0, 8.0),
+    "ddg": (3.0, 8.0),
+    "default": (3.0, 10.0),
+}
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+_timings: deque = deque(maxlen=500)
+
+
+def timeouts(backend: str) -> Tuple[float, float]:
+    connect, read = DEFAULT_TIMEOUTS.get(backend, DEFAULT_TIMEOUTS["default"])
+    env = os.environ.get
+    name = backend.upper()
+    return (float(env(f"TRAVIS_HTTP_{name}_CONNECT", connect)),
+            float(env(f"TRAVIS_HTTP_{name}_READ", read)))
+
+
+def _host_key(url: str) -> str:
+    parts = urllib.parse.urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_session(url: str) -> requests.Session:
+    """Keep-alive session for the host of `url`."""
+    key = _host_key(url)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            pool = int(os.environ.get("TRAVIS_HTTP_POOL", "4"))
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool, max_retries=0)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[key] = session
+        return session
+
+
+def abort(response: requests.Response):
+    """Close `response`, waking any thread blocked reading its body."""
+    raw = getattr(response, "raw", None)
+    sock = getattr(getattr(raw, "_connection", None), "sock", None)
+    if sock is None:
+        # urllib3 1.x: the socket sits behind http.client's file object.
+        sock = getattr(getattr(getattr(raw, "_fp", None), "fp", None), "raw", None)
+        sock = getattr(sock, "_sock", None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    try:
+        response.close()
+    except Exception:
+        pass
+
+
+class CancelScope:
+    """threading.Event-style cancel flag that also aborts the responses
+    opened under it with request(cancel=...)."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._responses = []
+
+    def is_set(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._event.wait(timeout)
+
+    def set(self):
+        with self._lock:
+            self._event.set()
+            responses, self._responses = self._responses, []
+        for response in responses:
+            abort(response)
+
+    def track(self, response: requests.Response):
+        with self._lock:
+            if not self._event.is_set():
+                self._responses.append(response)
+                return
+        abort(response)
+
+
+def request(method: str, url: str, backend: str = "default",
+            cancel: Optional[CancelScope] = None, **kwargs) -> requests.Response:
+    """Send a request on the pooled session for `url`'s host.
+
+    The backend's (connect, read) timeouts apply unless `timeout` is given.
+    With `cancel` the response is streamed and aborted when it is set.
+    For stream=True the recorded time is time to response headers.
+    """
+    kwargs.setdefault("timeout", timeouts(backend))
+    if cancel is not None:
+        if cancel.is_set():
+            raise requests.exceptions.ConnectionError("request cancelled")
+        kwargs["stream"] = True
+    t0 = time.perf_counter()
+    status = None
+    try:
+        response = get_session(url).request(method, url, **kwargs)
+        status = response.status_code
+        if cancel is not None:
+            cancel.track(response)
+        return response
+    finally:
+        elapsed = time.perf_counter() - t0
+        _timings.append((backend, _host_key(url), status, elapsed))
+        if os.environ.get("TRAVIS_HTTP_TIMING", "0").lower() in ("1", "true", "yes", "on"):
+            print(f"[HTTP] {backend} {method} {url.split('?')[0]} -> {status or 'error'} in {1000.0 * elapsed:.0f}ms")
+
+
+def get(url: str, backend: str = "default", **kwargs) -> requests.Response:
+    return request("GET", url, backend=backend, **kwargs)
+
+
+def post(url: str, backend: str = "default", **kwargs) -> requests.Response:
+    return request("POST", url, backend=backend, **kwargs)
+
+
+def timing_summary(backend: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    """Per-backend request count, error count and p50/p95/max latency in ms
+    over the most recent requests."""
+    by_backend: Dict[str, list] = {}
+    errors: Dict[str, int] = {}
+    for name, _, status, elapsed in list(_timings):
+        if backend is not None and name != backend:
+            continue
+        by_backend.setdefault(name, []).append(elapsed)
+        if status is None or status >= 400:
+            errors[name] = errors.get(name, 0) + 1
+
+    summary = {}
+    for name, values in by_backend.items():
+        vals = sorted(values)
+        pick = lambda q: 1000.0 * vals[min(len(vals) - 1, int(round(q * (len(vals) - 1))))]
+        summary[name] = {
+            "requests": len(vals),
+            "errors": errors.get(name, 0),
+            "p50_ms": pick(0.5),
+            "p95_ms": pick(0.95),
+            "max_ms": 1000.0 * vals[-1],
+        }
+    return summary
@@ -0,0 +1,146 @@
+"""
+Long-lived local (pyttsx3) text-to-speech engine.
+
+One thread initializes the pyttsx3 driver once and then serves every
+request; nothing else touches the engine, which is not thread-safe. Voice
+lookup walks the installed voices once per (hint, language) and is cached,
+so an utterance only pays for synthesis. A spoken utterance can be
+cancelled between words.
+"""
+
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Dict, Optional, Tuple
+
+
+DEFAULT_RATE = 165
+
+
+class LocalTTS:
+    def __init__(self, rate: int = DEFAULT_RATE, volume: float = 1.0):
+        self.rate = rate
+        self.volume = volume
+        self._jobs: "queue.Queue" = queue.Queue()
+        self._voices: Dict[Tuple[str, str], Optional[str]] = {}
+        self._voice: Optional[str] = None
+        self._engine = None
+        self._cancel: Optional[threading.Event] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def _submit(self, kind: str, text: str, out_path: Optional[str], hint: str, lang: str,
+                cancel: Optional[threading.Event]) -> Future:
+        fut: Future = Future()
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="local-tts", daemon=True)
+                self._thread.start()
+        self._jobs.put((kind, str(text), out_path, hint or "", lang or "en", cancel, fut))
+        return fut
+
+    def say(self, text: str, hint: str = "", lang: str = "en",
+            cancel: Optional[threading.Event] = None) -> Future:
+        """Speak through the audio device; the Future resolves when done."""
+        return self._submit("say", text, None, hint, lang, cancel)
+
+    def save(self, text: str, out_path: str, hint: str = "", lang: str = "en") -> Future:
+        """Render to a wav file; the Future resolves once it is written."""
+        return self._submit("save", text, out_path, hint, lang, None)
+
+    def _run(self):
+        try:
+            import pyttsx3
+            engine = pyttsx3.init()
+            engine.setProperty('rate', self.rate)
+            engine.setProperty('volume', self.volume)
+            engine.connect('started-word', self._on_word)
+            self._engine = engine
+        except Exception as e:
+            print(f"[LocalTTS] Engine init failed: {e}")
+            self._fail_pending(e)
+            return
+
+        while True:
+            kind, text, out_path, hint, lang, cancel, fut = self._jobs.get()
+            if not fut.set_running_or_notify_cancel():
+                continue
+            if cancel is not None and cancel.is_set():
+                fut.set_result(False)
+                continue
+            try:
+                voice = self._resolve_voice(engine, hint, lang)
+                if voice and voice != self._voice:
+                    engine.setProperty('voice', voice)
+                    self._voice = voice
+                self._cancel = cancel
+                if kind == "save":
+                    engine.save_to_file(text, out_path)
+                else:
+                    engine.say(text)
+                engine.runAndWait()
+                fut.set_result(not (cancel is not None and cancel.is_set()))
+            except Exception as e:
+                fut.set_exception(e)
+            finally:
+                self._cancel = None
+
+    def _fail_pending(self, error: Exception):
+        while True:
+            try:
+                job = self._jobs.get_nowait()
+            except queue.Empty:
+                return
+            if job[-1].set_running_or_notify_cancel():
+                job[-1].set_exception(error)
+
+    def _on_word(self, name, location, length):
+        if self._cancel is not None and self._cancel.is_set():
+            self._engine.stop()
+
+    def _resolve_voice(self, engine, hint: str, lang: str) -> Optional[str]:
+        key = (hint.lower(), lang.lower())
+        if key not in self._voices:
+            self._voices[key] = _find_voice(engine.getProperty('voices') or [], *key)
+        return self._voices[key]
+
+
+def _find_voice(voices, hint: str, lang: str) -> Optional[str]:
+    """Voice id for `hint` (name or id substring), else the first voice that
+    looks like `lang`, else the first installed voice."""
+    try:
+        if hint:
+            for v in voices:
+                name = (getattr(v, 'name', '') or '').lower()
+                vid = (getattr(v, 'id', '') or '').lower()
+                if hint in name or hint in vid:
+                    return v.id
+
+        for v in voices:
+            name = (getattr(v, 'name', '') or '').lower()
+            langs = ''.join(str(x) for x in (getattr(v, 'languages', []) or [])).lower()
+            vid = (getattr(v, 'id', '') or '').lower()
+            if lang == "en":
+                if 'zira' in name or 'en-us' in langs or 'en_us' in vid or 'english' in name:
+                    return v.id
+            elif lang in langs or f"{lang}-" in vid or f"{lang}_" in vid:
+                return v.id
+
+        if voices:
+            return voices[0].id
+    except Exception:
+        pass
+    return None
+
+
+_local: Optional[LocalTTS] = None
+_local_lock = threading.Lock()
+
+
+def get_local_tts() -> LocalTTS:
+    """Process-wide local TTS engine (thread started on first request)."""
+    global _local
+    with _local_lock:
+        if _local is None:
+            _local = LocalTTS()
+        return _local
@@ -1,24 +1,83 @@
+import json
 import os
-import requests
+import re
+from typing import Iterable, Iterator, Optional
 
+from core import http_client
 
-def ask_ollama(prompt: str) -> str:
-    host = os.environ.get("OLLAMA_HOST", "http://localhost:11434").rstrip("/")
-    model = os.environ.get("OLLAMA_MODEL", "mistral")
-    payload = {
-        "model": model,
+
+def _payload(prompt: str, stream: bool) -> dict:
+    return {
+        "model": os.environ.get("OLLAMA_MODEL", "mistral"),
         "prompt": prompt or "",
-        "stream": False,
+        "stream": stream,
         "keep_alive": os.environ.get("OLLAMA_KEEP_ALIVE", "1h"),
         "options": {
             "num_ctx": int(os.environ.get("OLLAMA_NUM_CTX", "4096")),
             "temperature": float(os.environ.get("OLLAMA_TEMPERATURE", "0.2")),
         },
     }
+
+
+def _host() -> str:
+    return os.environ.get("OLLAMA_HOST", "http://localhost:11434").rstrip("/")
+
+
+def ask_ollama(prompt: str) -> str:
     try:
-        response = requests.post(f"{host}/api/generate", json=payload, timeout=20)
+        response = http_client.post(f"{_host()}/api/generate", backend="ollama", json=_payload(prompt, False))
         response.raise_for_status()
         data = response.json()
         return data.get("response", "Sorry, I didn't get that.")
     except Exception:
         return "I couldn't connect to my brain. Try restarting Ollama."
+
+
+def stream_ollama(prompt: str, cancel: Optional[http_client.CancelScope] = None) -> Iterator[str]:
+    """Yield response tokens from Ollama's NDJSON stream as they are generated.
+
+    Raises on connection or server errors, so callers can fall back. Setting
+    `cancel` aborts the stream mid-generation.
+    """
+    with http_client.post(f"{_host()}/api/generate", backend="ollama",
+                          json=_payload(prompt, True), stream=True, cancel=cancel) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            data = json.loads(line)
+            if data.get("error"):
+                raise RuntimeError(data["error"])
+            token = data.get("response")
+            if token:
+                yield token
+            if data.get("done"):
+                return
+
+
+# End of sentence: . ! ? or Arabic question mark followed by whitespace, or a newline.
+_SENTENCE_END = re.compile(r"[.!?؟]+[\"')\]]*\s+|\n+")
+
+
+def split_sentences(tokens: Iterable[str], min_chars: int = 12) -> Iterator[str]:
+    """Group a token stream into sentences as soon as each one is complete.
+
+    Pieces shorter than `min_chars` ("Yes.", "Dr.") are joined to the next.
+    """
+    buf = ""
+    for token in tokens:
+        buf += token
+        start = 0
+        for m in _SENTENCE_END.finditer(buf):
+            piece = buf[start:m.end()].strip()
+            if len(piece) >= min_chars:
+                yield piece
+                start = m.end()
+        buf = buf[start:]
+    if buf.strip():
+        yield buf.strip()
+
+
+def stream_sentences(prompt: str, cancel: Optional[http_client.CancelScope] = None) -> Iterator[str]:
+    """Sentences of the Ollama reply to `prompt`, each yielded once complete."""
+    return split_sentences(stream_ollama(prompt, cancel))
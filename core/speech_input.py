@@ -0,0 +1,195 @@
+"""
+Resident speech input: one Vosk model and one open microphone stream.
+
+The model is loaded once per process and the shared capture (see
+core.audio_ring) stays open between commands; each listen() gets a fresh
+KaldiRecognizer on the shared model and its own cursor into the audio ring,
+so an utterance no longer pays model loading and device setup before the
+user is heard.
+
+With endpointing on (see core.vad), audio arrives in small blocks and the
+recognizer is finalized as soon as trailing silence follows speech, instead
+of waiting for Vosk's own final result or the fixed timeout.
+
+listen_stream() also yields partial hypotheses while the user is still
+speaking (see core.early_dispatch).
+
+Environment:
+  TRAVIS_VOSK_MODEL  -> model folder (default models/vosk-model-small-en-us-0.15)
+  TRAVIS_VAD, TRAVIS_VAD_*, TRAVIS_MAX_UTTERANCE_S -> endpointing (see core.vad)
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Iterator, Optional, Tuple
+
+from core.audio_ring import get_audio_capture
+from core.vad import Endpointer, block_ms, create_vad, vad_mode
+
+
+DEFAULT_MODEL = os.path.join("models", "vosk-model-small-en-us-0.15")
+
+
+def resolve_vosk_model_path(path: Optional[str] = None) -> str:
+    """Model folder from the argument or TRAVIS_VOSK_MODEL; relative paths are
+    taken from the project root."""
+    path = path or os.environ.get("TRAVIS_VOSK_MODEL") or DEFAULT_MODEL
+    if not os.path.isabs(path):
+        base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        path = os.path.join(base, path)
+    return path
+
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def load_vosk_model(path: Optional[str] = None):
+    """Process-wide vosk.Model for `path` (loaded on first use)."""
+    path = resolve_vosk_model_path(path)
+    with _models_lock:
+        model = _models.get(path)
+        if model is None:
+            if not os.path.isdir(path):
+                raise RuntimeError(f"Vosk model not found: {path}")
+            import vosk
+            t0 = time.time()
+            model = vosk.Model(path)
+            print(f"[Speech] Loaded Vosk model in {time.time() - t0:.1f}s.")
+            _models[path] = model
+        return model
+
+
+def strip_wake_word(text: Optional[str], word: Optional[str]) -> str:
+    """Drop a leading wake word (and anything heard before it) from `text`."""
+    text = (text or '').strip()
+    if word:
+        words = text.split()
+        low = [w.lower().strip(",.") for w in words]
+        # Only near the start: "travis lights off", "hey travis lights off".
+        if word.lower() in low[:3]:
+            text = " ".join(words[low.index(word.lower()) + 1:])
+    return text
+
+
+class SpeechInputEngine:
+    def __init__(self, model_path: Optional[str] = None):
+        self.model_path = resolve_vosk_model_path(model_path)
+        self.model = None
+        self.capture = get_audio_capture()
+        self.block_ms = 500
+        self.vad = None
+        self._open_lock = threading.Lock()
+        self._listen_lock = threading.Lock()
+
+    @property
+    def samplerate(self) -> Optional[int]:
+        return self.capture.samplerate
+
+    def start(self) -> "SpeechInputEngine":
+        """Load the model and start the shared capture (no-op when running)."""
+        with self._open_lock:
+            self.model = load_vosk_model(self.model_path)
+            rate = self.capture.samplerate
+            self.capture.start()
+            if self.vad is not None and rate == self.capture.samplerate:
+                return self
+            endpointing = vad_mode() not in ("off", "0", "none", "false")
+            self.block_ms = block_ms() if endpointing else 500
+            # Kept across listens so the energy VAD's noise floor carries over.
+            self.vad = create_vad(self.capture.samplerate, self.block_ms) if endpointing else None
+        return self
+
+    def recognizer(self):
+        """Fresh recognizer on the shared model."""
+        import vosk
+        return vosk.KaldiRecognizer(self.model, self.samplerate)
+
+    def listen_stream(self, timeout_seconds: float = 8, start_at: Optional[int] = None,
+                      preroll_ms: float = 0, strip_word: Optional[str] = None) -> Iterator[Tuple[str, str]]:
+        """Recognize one utterance, yielding ("partial", text) hypotheses as
+        audio arrives and ("final", text) once at the end.
+
+        Audio is read from the shared ring starting at `start_at` (default:
+        now) rewound by `preroll_ms`, so a command spoken straight after the
+        wake word is heard in full; `strip_word` (the wake word) is then
+        removed from the front of the transcript.
+
+        A partial is repeated on every block while it is unchanged, so
+        consumers can time how long a hypothesis has been stable.
+        `timeout_seconds` bounds the wait for speech to start; with
+        endpointing on, an utterance that has started may run up to
+        TRAVIS_MAX_UTTERANCE_S.
+        """
+        self.start()
+        with self._listen_lock:
+            rec = self.recognizer()
+            endpointer = Endpointer(self.vad, self.block_ms) if self.vad is not None else None
+            reader = self.capture.reader(start_at=start_at, rewind_ms=preroll_ms)
+            block = self.capture.bytes_for_ms(self.block_ms)
+            print('Listening... speak your command')
+            text = ''
+            deadline = time.time() + timeout_seconds
+            while time.time() < deadline:
+                data = reader.read(block, timeout=0.5)
+                if data is None:
+                    if not self.capture.running:
+                        break
+                    continue
+                if rec.AcceptWaveform(data):
+                    result = json.loads(rec.Result())
+                    text = strip_wake_word(result.get('text'), strip_word)
+                    if text:
+                        break
+                else:
+                    partial = strip_wake_word(json.loads(rec.PartialResult()).get('partial'), strip_word)
+                    if partial:
+                        yield "partial", partial
+                if endpointer is not None:
+                    started = endpointer.started
+                    if endpointer.push(data, self.samplerate):
+                        break
+                    if endpointer.started and not started:
+                        # Speech began: let it run up to the utterance cap.
+                        deadline = max(deadline, time.time() + endpointer.max_utterance_ms / 1000.0)
+
+            if not text:
+                final = json.loads(rec.FinalResult()).get('text', '')
+                text = strip_wake_word(final, strip_word)
+            yield "final", text
+
+    def listen(self, timeout_seconds: float = 8, **kwargs) -> str:
+        """Recognize one utterance; returns the text or an empty string."""
+        for kind, text in self.listen_stream(timeout_seconds, **kwargs):
+            if kind == "final":
+                return text
+        return ''
+
+
+_engine: Optional[SpeechInputEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_speech_input() -> SpeechInputEngine:
+    """Process-wide speech input engine (opened on first listen)."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = SpeechInputEngine()
+        return _engine
+
+
+def warm_up(background: bool = True):
+    """Load the model and open the microphone ahead of the first command."""
+    def _start():
+        try:
+            get_speech_input().start()
+        except Exception as e:
+            print(f"[Speech] Warm-up failed: {e}")
+
+    if background:
+        threading.Thread(target=_start, name="speech-warmup", daemon=True).start()
+    else:
+        _start()
@@ -0,0 +1,166 @@
+"""
+Single speech worker with a priority queue.
+
+Every speak() goes through one worker thread, so the reminder scheduler,
+calendar sync and the main loop never synthesize or play over each other.
+Higher priority utterances (alarms, reminders) are spoken before queued
+chatter; equal priorities keep their order. Each call returns a Future that
+completes when the utterance has been spoken, skipped or cancelled.
+
+Barge-in stops the current playback and drops everything queued below
+reminder priority: chatter and normal replies (e.g. the remaining sentences
+of a streamed answer) are discarded, reminders and alarms stay queued.
+
+With TRAVIS_BARGE_IN=1 the worker watches the shared microphone capture
+while it talks and barges in when the user starts speaking. It records
+where in the audio ring the user started (take_barge_in()), so the next
+listen() hears the words that triggered it. That needs a headset or an
+echo-cancelling microphone; otherwise Travis's own voice will trigger it.
+
+Environment:
+  TRAVIS_BARGE_IN             -> 1 to stop talking when the user speaks (default 0)
+  TRAVIS_BARGE_IN_PREROLL_MS  -> audio kept before the detected speech start (default 300)
+"""
+
+import itertools
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional, Tuple
+
+
+PRIORITY_CHATTER = 0
+PRIORITY_NORMAL = 10
+PRIORITY_REMINDER = 20
+PRIORITY_ALARM = 30
+
+
+def barge_in_enabled() -> bool:
+    return os.environ.get("TRAVIS_BARGE_IN", "0").lower() in ("1", "true", "yes", "on")
+
+
+class SpeechQueue:
+    def __init__(self, speak_now: Callable[[str, threading.Event], None]):
+        """`speak_now(text, cancel)` synthesizes and plays one utterance,
+        returning early once `cancel` is set."""
+        self.speak_now = speak_now
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._current: Optional[threading.Event] = None
+        self._current_priority = PRIORITY_NORMAL
+        self._thread: Optional[threading.Thread] = None
+        # (ring position where the user started talking, monotonic time)
+        self._barged_at: Optional[Tuple[int, float]] = None
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="speech-worker", daemon=True)
+                self._thread.start()
+
+    def say(self, text: str, priority: int = PRIORITY_NORMAL) -> Future:
+        """Queue `text`; the Future resolves to True once it was spoken."""
+        fut: Future = Future()
+        self._queue.put((-priority, next(self._order), str(text), fut))
+        self._ensure_worker()
+        return fut
+
+    def cancel_current(self):
+        with self._lock:
+            if self._current is not None:
+                self._current.set()
+
+    def barge_in(self, below: int = PRIORITY_REMINDER):
+        """Stop the current utterance and drop queued speech, both only when
+        below priority `below`; by default chatter and normal replies go,
+        reminders and alarms stay. Dropped Futures are cancelled."""
+        with self._lock:
+            if self._current is not None and self._current_priority < below:
+                self._current.set()
+        kept = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if -item[0] >= below:
+                kept.append(item)
+            else:
+                item[3].cancel()
+        for item in kept:
+            self._queue.put(item)
+
+    def take_barge_in(self, max_age_s: float = 5.0) -> Optional[int]:
+        """Ring position where the last microphone barge-in's speech began,
+        once, if it happened within `max_age_s`; else None."""
+        with self._lock:
+            barged, self._barged_at = self._barged_at, None
+        if barged is None or time.monotonic() - barged[1] > max_age_s:
+            return None
+        return barged[0]
+
+    def _run(self):
+        while True:
+            neg_priority, _, text, fut = self._queue.get()
+            if not fut.set_running_or_notify_cancel():
+                continue
+            cancel = threading.Event()
+            with self._lock:
+                self._current = cancel
+                self._current_priority = -neg_priority
+            done = threading.Event()
+            if barge_in_enabled():
+                threading.Thread(target=self._watch, args=(done,), name="speech-barge-in", daemon=True).start()
+            try:
+                self.speak_now(text, cancel)
+                fut.set_result(not cancel.is_set())
+            except Exception as e:
+                fut.set_exception(e)
+            finally:
+                done.set()
+                with self._lock:
+                    self._current = None
+
+    def _watch(self, done: threading.Event, voiced_ms: int = 300, block_ms: int = 30):
+        """Barge in once the microphone hears sustained speech during playback."""
+        from core.audio_ring import get_audio_capture
+        from core.vad import EnergyVAD
+
+        capture = get_audio_capture()
+        if not capture.running:
+            return
+        reader = capture.reader()
+        block = capture.bytes_for_ms(block_ms)
+        vad = EnergyVAD()
+        voiced = 0
+        while not done.is_set():
+            data = reader.read(block, timeout=0.2)
+            if data is None:
+                continue
+            if vad.is_speech(data, capture.samplerate):
+                voiced += block_ms
+                if voiced >= voiced_ms:
+                    print("[Speech] Barge-in: user started talking.")
+                    start = reader.pos - capture.bytes_for_ms(voiced)
+                    with self._lock:
+                        self._barged_at = (start, time.monotonic())
+                    self.barge_in()
+                    return
+            else:
+                voiced = 0
+
+
+_queue_obj: Optional[SpeechQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_speech_queue() -> SpeechQueue:
+    global _queue_obj
+    with _queue_lock:
+        if _queue_obj is None:
+            from core.voice_assistant import speak_now
+            _queue_obj = SpeechQueue(speak_now)
+        return _queue_obj
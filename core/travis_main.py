@@ -1,13 +1,25 @@
+import functools
 import os
-from core.voice_assistant import speak, listen
-from core.emotion import detect_emotion_from_face
-from core.face_store import recognize, ensure_owner_enrolled, get_owner_name
+from core.voice_assistant import render_speech, speak
+from core.speech_queue import PRIORITY_REMINDER, get_speech_queue
+from core.vision_pipeline import scan_identity_and_emotion
+from core import emotion as emotion_model
+from core import speech_input, tts_cache
+from core.camera import get_camera, release_camera
+from core.face_store import ensure_owner_enrolled, get_owner_name
 from core.hardware.serial_bridge import SerialBridge
 from core.command_interpreter import handle_command
 from core.calendar_manager import get_today_summary
 from core import calendar_google
 from core.reminder_manager import start_scheduler
 from core.calendar_sync import start_google_calendar_sync
+from core.emotion_monitor import EmotionMonitor, monitor_enabled
+from core.early_dispatch import listen_and_dispatch
+from core.wake_word_listener import WAKE_WORD, listen_for_wake_word
+
+
+def wake_word_enabled() -> bool:
+    return os.environ.get("TRAVIS_WAKE_WORD", "0").lower() in ("1", "true", "yes", "on")
 
 
 def normalize_emotion(e: str) -> str:
@@ -40,12 +52,18 @@ def emotion_to_serial_command(emotion: str) -> str:
 
 def main():
 
+    # Open the camera and load the emotion and speech models now so they are
+    # warm by the time the face scan and the first command start.
+    get_camera()
+    emotion_model.warm_up(background=True)
+    speech_input.warm_up(background=True)
+    tts_cache.prerender(render_speech)
+
     owner_name = ensure_owner_enrolled(speak)
 
 
     speak("Scanning face...")
-    user = recognize()
-    emotion = detect_emotion_from_face()
+    user, emotion = scan_identity_and_emotion()
 
 
     serial = SerialBridge(os.environ.get("TRAVIS_SERIAL_PORT", "COM4"))
@@ -93,12 +111,17 @@ def main():
             speak(summary)
 
 
-    start_scheduler(speak)
+    if monitor_enabled():
+        EmotionMonitor(serial, emotion_to_serial_command, initial=emo).start()
+
+    # Reminders go ahead of queued chatter and never block their threads.
+    remind = functools.partial(speak, priority=PRIORITY_REMINDER, block=False)
+    start_scheduler(remind)
 
     try:
         from core import calendar_google as cg
         if cg.is_available():
-            start_google_calendar_sync(speak, minutes_before=30, poll_seconds=300)
+            start_google_calendar_sync(remind, minutes_before=30, poll_seconds=300)
     except Exception:
         pass
 
@@ -106,12 +129,32 @@ def main():
 
 
     while True:
-        text = listen()
+        wake = {}
+        barged_at = get_speech_queue().take_barge_in()
+        if barged_at is not None:
+            # The user talked over Travis: start listening where they began.
+            wake = {
+                "start_at": barged_at,
+                "preroll_ms": float(os.environ.get("TRAVIS_BARGE_IN_PREROLL_MS", "300")),
+                "strip_word": WAKE_WORD,
+            }
+        elif wake_word_enabled():
+            # Rewind into the shared audio ring so "Travis, lights off" is one utterance.
+            wake = {
+                "start_at": listen_for_wake_word(),
+                "preroll_ms": float(os.environ.get("TRAVIS_WAKE_PREROLL_MS", "1500")),
+                "strip_word": WAKE_WORD,
+            }
+        # Device commands may already have run from a stable partial transcript.
+        text, handled = listen_and_dispatch(serial, **wake)
+        if handled:
+            continue
         if not text:
             speak("Please say something.")
             continue
         if text.strip().lower() in ("quit", "exit"):
             speak("Goodbye.")
+            release_camera()
             break
         handle_command(text, serial, speak, owner_name=owner_name)
 
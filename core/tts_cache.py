@@ -0,0 +1,170 @@
+"""
+Content-addressed, disk-backed cache of synthesized speech.
+
+Files are named by sha256(engine, voice, rate, text), so a hit skips
+synthesis entirely. A file's mtime is refreshed on every hit, and the least
+recently used files are evicted once the folder exceeds its size budget.
+
+Environment:
+  TRAVIS_TTS_CACHE         -> 0 to disable (default 1)
+  TRAVIS_TTS_CACHE_DIR     -> cache folder (default cache/tts)
+  TRAVIS_TTS_CACHE_MB      -> size budget in MB (default 50)
+  TRAVIS_TTS_PRERENDER     -> 1 to pre-render SYSTEM_PHRASES at startup, or a
+                              text file with one phrase per line (default off)
+"""
+
+import hashlib
+import os
+import threading
+import uuid
+from typing import Callable, Iterable, List, Optional
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Fixed responses worth having on disk before they are first needed.
+SYSTEM_PHRASES = [
+    "Scanning face...",
+    "Access denied. Unknown face. Security locked.",
+    "I'm ready. Awaiting your commands.",
+    "Please say something.",
+    "Goodbye.",
+    "For security, owner please look at the camera.",
+    "Access denied. Only the owner can add faces.",
+    "No name provided.",
+    "Failed to add face. Try again.",
+    "You have no upcoming events.",
+    "Opening in your browser.",
+    "Opening booking options in your browser.",
+    "I couldn't open the browser.",
+    "I didn't catch the time. Please try again later.",
+]
+
+
+def cache_key(text: str, engine: str, voice: str = "", rate="") -> str:
+    h = hashlib.sha256()
+    for part in (engine, voice or "", str(rate or ""), text):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class TTSCache:
+    def __init__(self, root: Optional[str] = None, max_bytes: Optional[int] = None,
+                 enabled: Optional[bool] = None):
+        env = os.environ.get
+        root = root or env("TRAVIS_TTS_CACHE_DIR") or os.path.join("cache", "tts")
+        self.root = root if os.path.isabs(root) else os.path.join(BASE_DIR, root)
+        self.max_bytes = max_bytes if max_bytes is not None else int(float(env("TRAVIS_TTS_CACHE_MB", "50")) * 1024 * 1024)
+        if enabled is None:
+            enabled = env("TRAVIS_TTS_CACHE", "1").lower() not in ("0", "false", "no", "off")
+        self.enabled = enabled
+        self._lock = threading.Lock()
+
+    def path(self, key: str, ext: str) -> str:
+        return os.path.join(self.root, f"{key}.{ext}")
+
+    def get(self, key: str, ext: str) -> Optional[str]:
+        """Cached file for `key`, or None; a hit counts as a use for LRU."""
+        if not self.enabled:
+            return None
+        path = self.path(key, ext)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def render(self, key: str, ext: str, synth: Callable[[str], None]) -> Optional[str]:
+        """Cached file for `key`, calling synth(out_path) to create it on a miss."""
+        hit = self.get(key, ext)
+        if hit:
+            return hit
+        os.makedirs(self.root, exist_ok=True)
+        # Unique temp name, so concurrent renders of the same text never clash.
+        tmp = os.path.join(self.root, f".{key}.{uuid.uuid4().hex}.part.{ext}")
+        try:
+            synth(tmp)
+            if not os.path.isfile(tmp) or os.path.getsize(tmp) == 0:
+                return None
+            path = self.path(key, ext)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+        self.evict()
+        return path
+
+    def evict(self):
+        """Drop least recently used files until the folder fits the budget."""
+        with self._lock:
+            try:
+                entries = []
+                for fn in os.listdir(self.root):
+                    if fn.startswith("."):
+                        continue
+                    p = os.path.join(self.root, fn)
+                    st = os.stat(p)
+                    entries.append((st.st_mtime, st.st_size, p))
+            except OSError:
+                return
+            total = sum(size for _, size, _ in entries)
+            for _, size, p in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(p)
+                    total -= size
+                except OSError:
+                    pass
+
+
+_cache: Optional[TTSCache] = None
+
+
+def get_tts_cache() -> TTSCache:
+    global _cache
+    if _cache is None:
+        _cache = TTSCache()
+    return _cache
+
+
+def prerender_phrases() -> List[str]:
+    """Phrases selected by TRAVIS_TTS_PRERENDER (empty when off)."""
+    opt = (os.environ.get("TRAVIS_TTS_PRERENDER", "0") or "0").strip()
+    if opt.lower() in ("0", "false", "no", "off", ""):
+        return []
+    if opt.lower() in ("1", "true", "yes", "on"):
+        return list(SYSTEM_PHRASES)
+    try:
+        with open(opt, "r", encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+    except Exception as e:
+        print(f"[TTS] Could not read pre-render list {opt}: {e}")
+        return []
+
+
+def prerender(render: Callable[[str], Optional[str]], phrases: Optional[Iterable[str]] = None,
+              background: bool = True):
+    """Render each phrase into the cache ahead of time with `render(text)`."""
+    phrases = list(phrases if phrases is not None else prerender_phrases())
+    if not phrases or not get_tts_cache().enabled:
+        return
+
+    def _run():
+        done = 0
+        for text in phrases:
+            try:
+                if render(text):
+                    done += 1
+            except Exception as e:
+                print(f"[TTS] Pre-render failed for {text!r}: {e}")
+        print(f"[TTS] Pre-rendered {done}/{len(phrases)} phrases.")
+
+    if background:
+        threading.Thread(target=_run, name="tts-prerender", daemon=True).start()
+    else:
+        _run()
@@ -0,0 +1,170 @@
+"""
+Streaming edge-tts playback: audio starts on the first chunk.
+
+edge-tts MP3 chunks are piped into an ffmpeg decoder as they arrive, and the
+decoded PCM goes through a small bounded queue to a sounddevice output
+stream, so nothing waits for the whole utterance and no temp file is
+written. The bounded queue also applies back-pressure to the decoder.
+
+Environment:
+  TRAVIS_TTS_STREAM  -> auto | 1 | 0 (default auto: on when ffmpeg and
+                        sounddevice are available)
+  TRAVIS_FFMPEG      -> ffmpeg executable (default: ffmpeg on PATH)
+"""
+
+import asyncio
+import os
+import queue
+import shutil
+import subprocess
+import threading
+from typing import Callable, Optional
+
+
+SAMPLE_RATE = 24000
+CHUNK_BYTES = 4800  # 100 ms of 24 kHz mono int16
+
+
+class StreamBrokeOff(RuntimeError):
+    """edge-tts failed after part of the utterance had already played."""
+
+
+def ffmpeg_bin() -> Optional[str]:
+    return shutil.which(os.environ.get("TRAVIS_FFMPEG", "ffmpeg"))
+
+
+def streaming_enabled() -> bool:
+    mode = (os.environ.get("TRAVIS_TTS_STREAM", "auto") or "auto").lower()
+    if mode in ("0", "false", "no", "off"):
+        return False
+    if not ffmpeg_bin():
+        return False
+    try:
+        import sounddevice  # noqa: F401
+        import edge_tts  # noqa: F401
+    except Exception:
+        return False
+    return True
+
+
+def stream_edge_tts(text: str, voice: str, cancel: Optional[threading.Event] = None,
+                    on_complete: Optional[Callable[[bytes], None]] = None,
+                    max_chunks: int = 16) -> bool:
+    """Synthesize and play `text`; returns True once any audio was played.
+
+    `on_complete(mp3_bytes)` receives the full MP3 when the utterance played
+    to the end (used to fill the TTS cache). Raises if synthesis failed, so
+    the caller can fall back: StreamBrokeOff when part of the utterance had
+    already played (edge-tts was reachable), the original error otherwise.
+    """
+    import edge_tts
+    import sounddevice as sd
+
+    cancel = cancel or threading.Event()
+    proc = subprocess.Popen(
+        [ffmpeg_bin(), "-loglevel", "quiet", "-i", "pipe:0",
+         "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    )
+    pcm: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=max_chunks)
+    mp3 = bytearray() if on_complete is not None else None
+    errors = []
+    # Set once playback is over for any reason, so the decoder never waits on
+    # a queue nobody drains (e.g. when the output device failed to open).
+    stop = threading.Event()
+
+    def halted() -> bool:
+        return cancel.is_set() or stop.is_set()
+
+    def feed():
+        async def run():
+            communicate = edge_tts.Communicate(str(text), voice=voice)
+            async for chunk in communicate.stream():
+                if cancel.is_set():
+                    return
+                if chunk["type"] == "audio":
+                    if mp3 is not None:
+                        mp3.extend(chunk["data"])
+                    proc.stdin.write(chunk["data"])
+                    proc.stdin.flush()
+
+        try:
+            asyncio.run(run())
+        except Exception as e:
+            errors.append(e)
+        finally:
+            try:
+                proc.stdin.close()
+            except Exception:
+                pass
+
+    def decode():
+        rest = b""
+        try:
+            while not halted():
+                data = proc.stdout.read(CHUNK_BYTES)
+                if not data:
+                    break
+                data = rest + data
+                # Whole int16 samples only; keep an odd trailing byte for next time.
+                cut = len(data) - len(data) % 2
+                rest = data[cut:]
+                while not halted():
+                    try:
+                        pcm.put(data[:cut], timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+        finally:
+            while not halted():
+                try:
+                    pcm.put(None, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+    feeder = threading.Thread(target=feed, name="tts-stream-feed", daemon=True)
+    decoder = threading.Thread(target=decode, name="tts-stream-decode", daemon=True)
+    feeder.start()
+    decoder.start()
+
+    played = False
+    finished = False
+    try:
+        with sd.RawOutputStream(samplerate=SAMPLE_RATE, channels=1, dtype="int16") as out:
+            while not cancel.is_set():
+                try:
+                    data = pcm.get(timeout=0.1)
+                except queue.Empty:
+                    if not decoder.is_alive():
+                        finished = True
+                        break
+                    continue
+                if data is None:
+                    finished = True
+                    break
+                if data:
+                    out.write(data)
+                    played = True
+            if cancel.is_set():
+                out.abort()
+    finally:
+        stop.set()
+        if proc.poll() is None:
+            if cancel.is_set() or not finished:
+                proc.kill()
+            else:
+                try:
+                    proc.wait(timeout=2)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+        feeder.join(timeout=1)
+
+    if errors and not cancel.is_set():
+        if played:
+            print(f"[TTS] edge-tts stream broke off mid-utterance: {errors[0]}")
+            raise StreamBrokeOff(str(errors[0])) from errors[0]
+        raise errors[0]
+    if played and not errors and not cancel.is_set() and on_complete is not None:
+        on_complete(bytes(mp3))
+    return played
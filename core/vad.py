@@ -0,0 +1,126 @@
+"""
+Voice-activity detection and end-of-utterance endpointing for listen().
+
+Backends:
+  energy  -> RMS against an adaptive noise floor (numpy only)
+  webrtc  -> py-webrtcvad; needs 10/20/30 ms blocks at 8/16/32/48 kHz
+
+Environment:
+  TRAVIS_VAD                -> auto | webrtc | energy | off (default auto:
+                               webrtc when installed and usable, else energy)
+  TRAVIS_VAD_BLOCK_MS       -> audio block length in ms (default 30)
+  TRAVIS_VAD_SILENCE_MS     -> trailing silence that ends an utterance (default 600)
+  TRAVIS_MAX_UTTERANCE_S    -> hard cap on one utterance once speech starts (default 8)
+  TRAVIS_VAD_AGGRESSIVENESS -> webrtc aggressiveness 0..3 (default 2)
+"""
+
+import os
+from typing import Optional
+
+import numpy as np
+
+
+WEBRTC_RATES = (8000, 16000, 32000, 48000)
+WEBRTC_BLOCK_MS = (10, 20, 30)
+
+
+def vad_mode() -> str:
+    return (os.environ.get("TRAVIS_VAD", "auto") or "auto").strip().lower()
+
+
+def block_ms() -> int:
+    return max(10, int(os.environ.get("TRAVIS_VAD_BLOCK_MS", "30")))
+
+
+class EnergyVAD:
+    """Speech when the block RMS clears a multiple of the tracked noise floor."""
+
+    name = "energy"
+
+    def __init__(self, ratio: float = 3.0, min_rms: float = 300.0):
+        self.ratio = ratio
+        self.min_rms = min_rms
+        self.floor: Optional[float] = None
+
+    def is_speech(self, block: bytes, samplerate: int) -> bool:
+        x = np.frombuffer(block, dtype=np.int16).astype(np.float32)
+        rms = float(np.sqrt(np.mean(x * x))) if x.size else 0.0
+        if self.floor is None:
+            self.floor = rms
+        speech = rms > max(self.min_rms, self.floor * self.ratio)
+        if not speech:
+            # Drop quickly to a quieter room, rise slowly with background noise.
+            self.floor = rms if rms < self.floor else 0.98 * self.floor + 0.02 * rms
+        return speech
+
+
+class WebRtcVAD:
+    name = "webrtc"
+
+    def __init__(self, aggressiveness: int = 2):
+        import webrtcvad
+        self._vad = webrtcvad.Vad(max(0, min(3, aggressiveness)))
+
+    def is_speech(self, block: bytes, samplerate: int) -> bool:
+        return bool(self._vad.is_speech(block, samplerate))
+
+
+def create_vad(samplerate: int, block: int, mode: Optional[str] = None):
+    """VAD for the given stream format, or None when endpointing is off."""
+    mode = mode or vad_mode()
+    if mode in ("off", "0", "none", "false"):
+        return None
+    if mode in ("auto", "webrtc"):
+        if samplerate in WEBRTC_RATES and block in WEBRTC_BLOCK_MS:
+            try:
+                return WebRtcVAD(int(os.environ.get("TRAVIS_VAD_AGGRESSIVENESS", "2")))
+            except Exception as e:
+                if mode == "webrtc":
+                    print(f"[VAD] webrtcvad unavailable ({e}); using energy VAD.")
+        elif mode == "webrtc":
+            print("[VAD] webrtcvad needs 10/20/30 ms blocks at 8/16/32/48 kHz; using energy VAD.")
+    return EnergyVAD()
+
+
+class Endpointer:
+    """Tracks one utterance block by block and reports when it has ended.
+
+    Speech starts after `min_speech_ms` of voiced blocks; it ends after
+    `silence_ms` of trailing silence or once `max_utterance_s` have passed
+    since speech started.
+    """
+
+    def __init__(self, vad, block_ms: int, silence_ms: Optional[int] = None,
+                 max_utterance_s: Optional[float] = None, min_speech_ms: int = 90):
+        env = os.environ.get
+        self.vad = vad
+        self.block_ms = block_ms
+        self.silence_ms = silence_ms if silence_ms is not None else int(env("TRAVIS_VAD_SILENCE_MS", "600"))
+        self.max_utterance_ms = 1000.0 * (max_utterance_s if max_utterance_s is not None
+                                          else float(env("TRAVIS_MAX_UTTERANCE_S", "8")))
+        self.min_speech_ms = min_speech_ms
+        self.reset()
+
+    def reset(self):
+        self.started = False
+        self._voiced_ms = 0
+        self._silent_ms = 0
+        self._utterance_ms = 0
+
+    def push(self, block: bytes, samplerate: int) -> bool:
+        """Feed one block; True once the utterance is over."""
+        speech = self.vad.is_speech(block, samplerate)
+        if speech:
+            self._voiced_ms += self.block_ms
+            self._silent_ms = 0
+            if self._voiced_ms >= self.min_speech_ms:
+                self.started = True
+        elif self.started:
+            self._silent_ms += self.block_ms
+        else:
+            # Clicks and short noises before speech do not count.
+            self._voiced_ms = 0
+        if self.started:
+            self._utterance_ms += self.block_ms
+        return self.started and (self._silent_ms >= self.silence_ms
+                                 or self._utterance_ms >= self.max_utterance_ms)
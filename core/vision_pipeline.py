@@ -0,0 +1,79 @@
+"""
+Single-pass vision pipeline: identity and emotion from the same frames.
+
+Each frame is read once from the shared camera and faces are detected once.
+The same face boxes feed the encoder (for gallery matching) and, as crops,
+the emotion classifier, so both answers describe the same person in the
+same frames.
+"""
+
+import os
+from typing import Optional, Tuple
+
+from core.camera import get_camera
+from core.emotion import aggregate_votes, classify_faces, face_crop
+from core.face_detectors import box_area
+from core.face_store import analyze_frame, gallery_index, new_tracker
+
+
+def scan_identity_and_emotion(max_tries: int = 6, tolerance: float = 0.58,
+                              emotion_frames: Optional[int] = None) -> Tuple[Optional[str], str]:
+    """Return (recognized name or None, mapped emotion) from one pass over the camera."""
+    if emotion_frames is None:
+        emotion_frames = int(os.environ.get("TRAVIS_EMOTION_FRAMES", "5"))
+    emotion_frames = max(1, emotion_frames)
+
+    try:
+        index = gallery_index()
+    except Exception as e:
+        print(f"[Vision] Failed to open encodings store: {e}")
+        index = None
+    if index is None or not len(index):
+        print("[FaceStore] No stored faces.")
+        index = None
+
+    user = None
+    crops = []
+    frames_seen = 0
+    tracker = new_tracker()
+    camera = get_camera()
+    for seq, frame in camera.frames(max(max_tries, emotion_frames)):
+        frames_seen += 1
+        boxes, encodings = analyze_frame(frame, tracker)
+        if not boxes:
+            continue
+
+        # Follow the recognized face for emotion; otherwise the largest face.
+        target = max(range(len(boxes)), key=lambda i: box_area(boxes[i]))
+        if index is not None and encodings:
+            matches = index.match(encodings, k=1)
+            best_i, best_dist = None, 1.0
+            for i, hits in enumerate(matches):
+                if hits and hits[0][1] < best_dist:
+                    best_i, best_dist = i, hits[0][1]
+            if best_i is not None and best_dist <= tolerance:
+                target = best_i
+                if user is None:
+                    user = matches[best_i][0][0]
+                    print(f"[FaceStore] Recognized: {user} (dist={best_dist:.2f})")
+
+        if len(crops) < emotion_frames:
+            crop = face_crop(frame, boxes[target], frame_id=camera.frame_key(seq))
+            if crop is not None:
+                crops.append(crop)
+
+        identity_done = user is not None or index is None or frames_seen >= max_tries
+        if identity_done and len(crops) >= emotion_frames:
+            break
+
+    if user is None:
+        print("[FaceStore] Face not recognized.")
+
+    samples = [got for got in classify_faces(crops) if got]
+    emotion, agg = aggregate_votes(samples)
+    if emotion:
+        print(f"[Emotion] Detected: {emotion} ({agg:.2f} agg)")
+    else:
+        print("[Emotion] Could not detect emotion. Falling back to neutral.")
+        emotion = "neutral"
+    return user, emotion
@@ -1,27 +1,16 @@
 import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
 import traceback
-import pyttsx3
-import time
-import json
 import asyncio
+from concurrent.futures import Future
+from typing import Optional
 
-
-def _select_english_voice(engine):
-    try:
-        voices = engine.getProperty('voices') or []
-
-        for v in voices:
-            name = (getattr(v, 'name', '') or '').lower()
-            lang = ''.join(getattr(v, 'languages', []) or []).lower()
-            vid = (getattr(v, 'id', '') or '').lower()
-            if 'zira' in name or 'en-us' in lang or 'en_us' in vid or 'english' in name:
-                engine.setProperty('voice', v.id)
-                return
-
-        if voices:
-            engine.setProperty('voice', voices[0].id)
-    except Exception:
-        pass
+from core.local_tts import DEFAULT_RATE, get_local_tts
+from core.speech_queue import PRIORITY_NORMAL, barge_in_enabled, get_speech_queue
 
 
 def _play_chime():
@@ -46,98 +35,230 @@ def _play_chime():
         pass
 
 
-def speak(text):
-    if not text:
-        return
-    print(f"[Travis says]: {text}")
+PYTTSX3_RATE = DEFAULT_RATE
 
 
-    engine_pref = (os.environ.get('TRAVIS_TTS_ENGINE', 'auto') or 'auto').lower()
-    voice_hint = os.environ.get('TRAVIS_TTS_VOICE') or os.environ.get('TRAVIS_TTS_VOICE_HINT') or ''
-    base_dir = os.path.dirname(__file__)
+def _voice_hint() -> str:
+    return os.environ.get('TRAVIS_TTS_VOICE') or os.environ.get('TRAVIS_TTS_VOICE_HINT') or ''
 
-    if engine_pref in ('auto', 'edge', 'edge-tts', 'edge_tts'):
+
+def _render(parts, ext: str, synth):
+    """(path, is_temp) of the audio for `parts` (text, engine, voice, rate).
+
+    Comes from the TTS cache when enabled; otherwise it is synthesized into a
+    per-utterance temp file that the caller deletes after playback.
+    """
+    from core.tts_cache import cache_key, get_tts_cache
+
+    cache = get_tts_cache()
+    if cache.enabled:
+        return cache.render(cache_key(*parts), ext, synth), False
+    fd, path = tempfile.mkstemp(prefix="travis-tts-", suffix=f".{ext}")
+    os.close(fd)
+    try:
+        synth(path)
+    except Exception:
+        _remove(path)
+        raise
+    return path, True
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _render_edge(text: str, voice_name: str):
+    import edge_tts
+
+    async def gen(tts_text: str, voice: str, out_path: str):
+        communicate = edge_tts.Communicate(tts_text, voice=voice)
+        with open(out_path, 'wb') as f:
+            async for chunk in communicate.stream():
+                if chunk["type"] == "audio":
+                    f.write(chunk["data"])
+
+    def synth(out_path: str):
         try:
-            import edge_tts
+            asyncio.run(gen(str(text), voice_name, out_path))
+        except RuntimeError:
 
-            async def gen(tts_text: str, voice_name: str, out_path: str):
-                communicate = edge_tts.Communicate(tts_text, voice=voice_name)
-                with open(out_path, 'wb') as f:
-                    async for chunk in communicate.stream():
-                        if chunk["type"] == "audio":
-                            f.write(chunk["data"])
+            loop = asyncio.new_event_loop()
+            loop.run_until_complete(gen(str(text), voice_name, out_path))
+            loop.close()
 
-            voice_name = voice_hint or 'en-US-JennyNeural'
-            out_path = os.path.join(base_dir, '_edge_tts.mp3')
-            try:
-                asyncio.run(gen(str(text), voice_name, out_path))
-            except RuntimeError:
+    return _render((str(text), 'edge', voice_name, ''), 'mp3', synth)
 
-                loop = asyncio.new_event_loop()
-                loop.run_until_complete(gen(str(text), voice_name, out_path))
-                loop.close()
 
-            _play_chime()
-            try:
-                from playsound import playsound
-                playsound(out_path)
-                return
-            except Exception:
-                pass
-        except Exception:
+def _stream_edge(text: str, voice_name: str, cancel: threading.Event) -> bool:
+    """Play edge-tts audio as it streams in (see core.tts_stream); True if played.
 
+    A cached rendering is played from disk instead, and a streamed utterance
+    that played to the end is stored in the cache.
+    """
+    from core.tts_cache import cache_key, get_tts_cache
+    from core.tts_stream import stream_edge_tts, streaming_enabled
+
+    cache = get_tts_cache()
+    key = cache_key(str(text), 'edge', voice_name, '')
+    if not streaming_enabled() or cache.get(key, 'mp3'):
+        return False
+
+    def store(mp3: bytes):
+        def write(out_path: str):
+            with open(out_path, 'wb') as f:
+                f.write(mp3)
+        try:
+            cache.render(key, 'mp3', write)
+        except Exception:
             pass
 
+    _play_chime()
+    return stream_edge_tts(text, voice_name, cancel, on_complete=store if cache.enabled else None)
 
-    try:
-        _play_chime()
-        engine = pyttsx3.init()
-        engine.setProperty('rate', 165)
-        engine.setProperty('volume', 1.0)
 
-        hint = voice_hint.lower()
-        if hint:
-            try:
-                for v in engine.getProperty('voices') or []:
-                    name = (getattr(v, 'name', '') or '').lower()
-                    vid = (getattr(v, 'id', '') or '').lower()
-                    if hint in name or hint in vid:
-                        engine.setProperty('voice', v.id)
-                        break
-            except Exception:
-                pass
+def _render_pyttsx3(text: str, hint: str):
+    def synth(out_path: str):
+        get_local_tts().save(str(text), out_path, hint=hint).result()
+
+    return _render((str(text), 'pyttsx3', hint, PYTTSX3_RATE), 'wav', synth)
+
+
+def _play_file(path: str, cancel: Optional[threading.Event] = None) -> bool:
+    """Play an audio file to the end, or until `cancel` is set.
+
+    With barge-in enabled, playback runs in a child process (ffplay when
+    installed, else playsound in a child Python) so it can be killed;
+    otherwise it plays in-process and is not interruptible.
+    """
+    if cancel is not None and barge_in_enabled():
+        if shutil.which("ffplay"):
+            cmd = ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", path]
         else:
-            _select_english_voice(engine)
-        engine.say(str(text))
-        engine.runAndWait()
-        return
+            cmd = [sys.executable, "-c", "import sys; from playsound import playsound; playsound(sys.argv[1])", path]
+        try:
+            proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            while proc.poll() is None:
+                if cancel.wait(0.05):
+                    proc.kill()
+                    proc.wait()
+                    return True
+            if proc.returncode == 0:
+                return True
+        except Exception:
+            pass
+    try:
+        from playsound import playsound
+        playsound(path)
+        return True
     except Exception:
         pass
+    if path.endswith('.wav'):
+        try:
+            import winsound
+            winsound.PlaySound(path, winsound.SND_FILENAME)
+            return True
+        except Exception:
+            pass
+    return False
 
 
-    try:
-        base_dir = os.path.dirname(__file__)
-        tts_path = os.path.join(base_dir, "_tts.wav")
-        engine = pyttsx3.init()
-        engine.setProperty('rate', 165)
-        engine.setProperty('volume', 1.0)
-        _select_english_voice(engine)
-        engine.save_to_file(str(text), tts_path)
-        engine.runAndWait()
-
+def render_speech(text):
+    """Synthesize `text` into the TTS cache the way speak() would, without
+    playing it (used to pre-render fixed phrases)."""
+    engine_pref = (os.environ.get('TRAVIS_TTS_ENGINE', 'auto') or 'auto').lower()
+    voice_hint = _voice_hint()
+    if engine_pref in ('auto', 'edge', 'edge-tts', 'edge_tts'):
         try:
-            from playsound import playsound
-            playsound(tts_path)
-            return
+            return _render_edge(text, voice_hint or 'en-US-JennyNeural')[0]
         except Exception:
             pass
+    return _render_pyttsx3(text, voice_hint)[0]
+
+
+def speak(text, priority: int = PRIORITY_NORMAL, block: bool = True) -> Optional[Future]:
+    """Speak `text` through the speech queue (see core.speech_queue).
 
+    Blocks until it has been spoken unless block=False; returns the Future
+    either way.
+    """
+    if not text:
+        return None
+    fut = get_speech_queue().say(text, priority)
+    if block:
         try:
-            import winsound
-            winsound.PlaySound(tts_path, winsound.SND_FILENAME)
-            return
+            fut.result()
         except Exception:
             pass
+    return fut
+
+
+def speak_now(text, cancel: Optional[threading.Event] = None):
+    """Synthesize and play `text` on the calling thread (the speech worker)."""
+    if not text:
+        return
+    print(f"[Travis says]: {text}")
+    cancel = cancel or threading.Event()
+
+
+    engine_pref = (os.environ.get('TRAVIS_TTS_ENGINE', 'auto') or 'auto').lower()
+    voice_hint = _voice_hint()
+
+    if engine_pref in ('auto', 'edge', 'edge-tts', 'edge_tts'):
+        from core.tts_stream import StreamBrokeOff
+
+        edge_reachable = True
+        try:
+            if _stream_edge(text, voice_hint or 'en-US-JennyNeural', cancel):
+                return
+        except StreamBrokeOff:
+            # Part of it played: speak it again from an edge-tts file.
+            pass
+        except Exception:
+            # edge-tts failed before any audio; don't pay for a second attempt.
+            edge_reachable = False
+        if edge_reachable:
+            try:
+                out_path, temp = _render_edge(text, voice_hint or 'en-US-JennyNeural')
+                if out_path:
+                    try:
+                        if cancel.is_set():
+                            return
+                        _play_chime()
+                        if _play_file(out_path, cancel):
+                            return
+                    finally:
+                        if temp:
+                            _remove(out_path)
+            except Exception:
+
+                pass
+
+
+    try:
+        # Cached (or pre-rendered) local speech plays without touching the engine.
+        tts_path, temp = _render_pyttsx3(text, voice_hint)
+        if tts_path:
+            try:
+                if cancel.is_set():
+                    return
+                _play_chime()
+                if _play_file(tts_path, cancel):
+                    return
+            finally:
+                if temp:
+                    _remove(tts_path)
+    except Exception:
+        pass
+
+
+    if cancel.is_set():
+        return
+    try:
+        _play_chime()
+        get_local_tts().say(str(text), hint=voice_hint, cancel=cancel).result()
     except Exception:
         print("[Voice Error]: synthesis failed")
         traceback.print_exc()
@@ -147,60 +268,12 @@ def listen(timeout_seconds: int = 8) -> str:
     """Listen from microphone using Vosk if available; fallback to keyboard input.
 
     Returns the recognized text (lowercased as produced by Vosk), or empty string.
+    The model and input stream are kept resident (see core.speech_input).
     """
 
     try:
-        import sounddevice as sd
-        import vosk
-        import queue
-
-
-        base_dir = os.path.dirname(os.path.dirname(__file__))
-        model_path = os.path.join(base_dir, 'models', 'vosk-model-small-en-us-0.15')
-        if not os.path.isdir(model_path):
-            raise RuntimeError('Vosk model not found')
-
-        model = vosk.Model(model_path)
-        q: "queue.Queue[bytes]" = queue.Queue()
-
-        def callback(indata, frames, time_info, status):
-            if status:
-                print(status)
-            q.put(bytes(indata))
-
-
-        samplerates = [16000, 44100, 48000]
-        stream = None
-        rec = None
-        for sr in samplerates:
-            try:
-                stream = sd.RawInputStream(samplerate=sr, blocksize=sr // 2, dtype='int16',
-                                           channels=1, callback=callback)
-                rec = vosk.KaldiRecognizer(model, sr)
-                break
-            except Exception:
-                stream = None
-                rec = None
-                continue
-        if stream is None or rec is None:
-            raise RuntimeError('No audio input device or unsupported sample rate')
-
-        print('Listening... speak your command')
-        text = ''
-        t0 = time.time()
-        with stream:
-            while time.time() - t0 < timeout_seconds:
-                data = q.get()
-                if rec.AcceptWaveform(data):
-                    result = json.loads(rec.Result())
-                    text = (result.get('text') or '').strip()
-                    if text:
-                        break
-
-            if not text:
-                final = json.loads(rec.FinalResult()).get('text', '')
-                text = (final or '').strip()
-        return text
+        from core.speech_input import get_speech_input
+        return get_speech_input().listen(timeout_seconds)
     except Exception:
 
         try:
@@ -1,30 +1,104 @@
+"""
+Wake-word spotting on the shared microphone capture.
 
+The Vosk model is resolved like the command recognizer's (see
+core.speech_input) and loaded on the first wait, not at import; when both
+use the same folder they share one model instance.
+
+In low-CPU mode the recognizer is restricted to a grammar of the wake word
+plus "[unk]", and blocks the energy VAD marks as silence are not decoded at
+all, so always-on listening idles at a small fraction of a core.
+
+Environment:
+  TRAVIS_WAKE_MODEL    -> model folder (default: TRAVIS_VOSK_MODEL / the speech model)
+  TRAVIS_WAKE_LOW_CPU  -> 0 to decode every block with the full vocabulary (default 1)
+"""
 
-import sounddevice as sd
-import vosk
-import queue
 import json
+import os
+import threading
+from typing import Optional
 
-q = queue.Queue()
+from core.audio_ring import get_audio_capture
+from core.speech_input import load_vosk_model, resolve_vosk_model_path
+from core.vad import EnergyVAD
 
-model = vosk.Model("models/vosk-model-small-en-us-0.15")
 
-def callback(indata, frames, time, status):
-    if status:
-        print(status)
-    q.put(bytes(indata))
+WAKE_WORD = "travis"
 
-def listen_for_wake_word():
-    with sd.RawInputStream(samplerate=16000, blocksize=8000, dtype='int16',
-                           channels=1, callback=callback):
-        rec = vosk.KaldiRecognizer(model, 16000)
+
+class WakeWordEngine:
+    def __init__(self, word: str = WAKE_WORD, model_path: Optional[str] = None,
+                 low_cpu: Optional[bool] = None, block_ms: int = 250, hangover_ms: int = 750):
+        self.word = word.lower()
+        self.model_path = resolve_vosk_model_path(model_path or os.environ.get("TRAVIS_WAKE_MODEL"))
+        if low_cpu is None:
+            low_cpu = os.environ.get("TRAVIS_WAKE_LOW_CPU", "1").lower() not in ("0", "false", "no", "off")
+        self.low_cpu = low_cpu
+        self.block_ms = block_ms
+        self.hangover_ms = hangover_ms
+        self._vad = EnergyVAD() if low_cpu else None
+
+    def _recognizer(self, samplerate: int):
+        import vosk
+        model = load_vosk_model(self.model_path)
+        if self.low_cpu:
+            return vosk.KaldiRecognizer(model, samplerate, json.dumps([self.word, "[unk]"]))
+        return vosk.KaldiRecognizer(model, samplerate)
+
+    def wait(self, stop: Optional[threading.Event] = None) -> Optional[int]:
+        """Block until the wake word is heard; returns the audio ring position
+        right after the detecting block (None if `stop` was set)."""
+        capture = get_audio_capture().start()
+        reader = capture.reader()
+        block = capture.bytes_for_ms(self.block_ms)
+        rec = self._recognizer(capture.samplerate)
+        quiet_ms = self.hangover_ms
 
         print("Waiting for wake word...")
-        while True:
-            data = q.get()
+        while stop is None or not stop.is_set():
+            data = reader.read(block, timeout=1.0)
+            if data is None:
+                capture.start()
+                continue
+            if self._vad is not None:
+                if self._vad.is_speech(data, capture.samplerate):
+                    quiet_ms = 0
+                else:
+                    quiet_ms += self.block_ms
+                    if quiet_ms > self.hangover_ms:
+                        # Silence: skip decoding, but close out a pending hypothesis once.
+                        if quiet_ms - self.block_ms <= self.hangover_ms:
+                            rec.Reset()
+                        continue
             if rec.AcceptWaveform(data):
-                result = json.loads(rec.Result())
-                text = result.get("text", "")
-                if "travis" in text.lower():
-                    print("Wake word detected!")
-                    return
+                text = json.loads(rec.Result()).get("text", "")
+            else:
+                text = json.loads(rec.PartialResult()).get("partial", "")
+            if self.word in text.lower().split():
+                print("Wake word detected!")
+                rec.Reset()
+                return reader.pos
+        return None
+
+
+_engine: Optional[WakeWordEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_wake_word_engine() -> WakeWordEngine:
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = WakeWordEngine()
+        return _engine
+
+
+def listen_for_wake_word():
+    """Block until the wake word is heard on the shared microphone capture.
+
+    Returns the audio ring position right after the detecting block, so the
+    command recognizer can pick up from there (with a pre-roll) instead of
+    reopening the device and missing the words after "Travis".
+    """
+    return get_wake_word_engine().wait()